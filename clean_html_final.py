@@ -1,269 +1,303 @@
 import re
-from html import unescape
+from html import escape
+from html.parser import HTMLParser
+
+from list_writer import ListWriter, list_level
+from mojibake import RepairWriter
 
 # Read the original file
 input_file = r'c:\Users\bchance\Dropbox\My Documents\Classes\Stat 301 - Win 26\lectures\review1.html'
 output_file = r'c:\Users\bchance\Dropbox\My Documents\Classes\Stat 301 - Win 26\lectures\review1_clean.html'
 
-with open(input_file, 'r', encoding='windows-1252') as f:
-    content = f.read()
-
-# Extract body content
-body_match = re.search(r'<body[^>]*>(.*?)</body>', content, re.DOTALL)
-if not body_match:
-    print("Could not find body content")
-    exit(1)
-
-body_content = body_match.group(1)
-
-# Remove all MSO/Office tags and comments
-body_content = re.sub(r'<o:p>.*?</o:p>', '', body_content, flags=re.DOTALL)
-body_content = re.sub(r'<!\[if[^\]]*\]>.*?<!\[endif\]>', '', body_content, flags=re.DOTALL)
-body_content = re.sub(r'<!--\[if[^\]]*\]>.*?<!\[endif\]-->', '', body_content, flags=re.DOTALL)
-body_content = re.sub(r'<!--.*?-->', '', body_content, flags=re.DOTALL)
-body_content = re.sub(r'<v:.*?>.*?</v:.*?>', '', body_content, flags=re.DOTALL)
-body_content = re.sub(r'<xml>.*?</xml>', '', body_content, flags=re.DOTALL)
-
-# Remove Word section divs
-body_content = re.sub(r'<div class=WordSection\d+>', '', body_content)
-body_content = re.sub(r'</div>\s*$', '', body_content, flags=re.DOTALL)
-
-# Extract all paragraphs with their attributes
-paragraphs = re.findall(r'<p\s+class=([^>]+)>(.*?)</p>', body_content, re.DOTALL)
-
-# Process each paragraph
-processed = []
-for class_attr, para_content in paragraphs:
-    # Clean the content
-    para_content = re.sub(r'<span[^>]*>', '', para_content)
-    para_content = re.sub(r'</span>', '', para_content)
-    para_content = re.sub(r'<b[^>]*>', '<strong>', para_content)
-    para_content = re.sub(r'</b>', '</strong>', para_content)
-    para_content = re.sub(r'<i[^>]*>', '<em>', para_content)
-    para_content = re.sub(r'</i>', '</em>', para_content)
-    
-    # Preserve links
-    para_content = re.sub(r'<a[^>]*href="([^"]+)"[^>]*>(.*?)</a>', r'<a href="\1">\2</a>', para_content)
-    
-    # Remove images but keep placeholder for math symbols
-    para_content = re.sub(r'<img[^>]*>', 'p̂', para_content)
-    
-    # Unescape HTML entities
-    para_content = unescape(para_content)
-    
-    # Clean extra whitespace
-    para_content = re.sub(r'\s+', ' ', para_content).strip()
-    
-    if not para_content:
-        continue
-    
-    # Determine the type
-    is_list_item = 'MsoListParagraph' in class_attr
-    is_centered = 'text-align:center' in str(class_attr)
-    
-    processed.append({
-        'content': para_content,
-        'is_list': is_list_item,
-        'is_centered': is_centered,
-        'original_class': class_attr
-    })
-
-# Build the HTML output
-html_lines = [
-    '<!DOCTYPE html>',
-    '<html lang="en">',
-    '<head>',
-    '    <meta charset="UTF-8">',
-    '    <meta name="viewport" content="width=device-width, initial-scale=1.0">',
-    '    <title>Stat 301 - Exam 1 Preparations</title>',
-    '    <style>',
-    '        body {',
-    '            font-family: Arial, sans-serif;',
-    '            line-height: 1.6;',
-    '            max-width: 900px;',
-    '            margin: 0 auto;',
-    '            padding: 20px;',
-    '            color: #333;',
-    '            background-color: #fff;',
-    '        }',
-    '        h1 {',
-    '            text-align: center;',
-    '            color: #000;',
-    '            margin-bottom: 1.5em;',
-    '            font-size: 1.8em;',
-    '        }',
-    '        h2 {',
-    '            margin-top: 1.5em;',
-    '            margin-bottom: 0.5em;',
-    '            color: #000;',
-    '            font-size: 1.3em;',
-    '        }',
-    '        p {',
-    '            margin: 0.8em 0;',
-    '        }',
-    '        ul {',
-    '            margin: 0.8em 0;',
-    '            padding-left: 2em;',
-    '            list-style-type: disc;',
-    '        }',
-    '        ul ul {',
-    '            list-style-type: circle;',
-    '            margin: 0.3em 0;',
-    '        }',
-    '        li {',
-    '            margin: 0.4em 0;',
-    '        }',
-    '        strong {',
-    '            font-weight: bold;',
-    '        }',
-    '        em {',
-    '            font-style: italic;',
-    '        }',
-    '        a {',
-    '            color: #0066cc;',
-    '            text-decoration: underline;',
-    '        }',
-    '        a:hover {',
-    '            color: #004499;',
-    '        }',
-    '        a:visited {',
-    '            color: #800080;',
-    '        }',
-    '        .note {',
-    '            color: #0066cc;',
-    '        }',
-    '        .important {',
-    '            color: #cc0000;',
-    '        }',
-    '    </style>',
-    '</head>',
-    '<body>',
-    ''
-]
-
-# Process the content and build proper structure
-in_list = False
-prev_was_list = False
-
-for i, item in enumerate(processed):
-    content = item['content']
-    is_list = item['is_list']
-    is_centered = item['is_centered']
-    
-    # Check if this is a heading (bold text ending with colon)
-    is_heading = (content.startswith('<strong>') and 
-                  (':</strong>' in content or content.endswith(':</strong>')) and
-                  not is_list)
-    
-    # First item - make it the title
-    if i == 0 and is_centered:
-        title_text = re.sub(r'</?strong>', '', content)
-        html_lines.append(f'    <h1>{title_text}</h1>')
-        html_lines.append('')
-        continue
-    
-    # Handle heading
-    if is_heading and not is_list:
-        # Close list if open
-        if in_list:
-            html_lines.append('    </ul>')
-            html_lines.append('')
-            in_list = False
-        
-        # Add heading
-        heading_text = re.sub(r'<strong>(.*?):</strong>', r'\1', content)
-        heading_text = re.sub(r'</?strong>', '', heading_text).strip()
-        html_lines.append(f'    <h2>{heading_text}</h2>')
-        html_lines.append('')
-        
-    # Handle list item
-    elif is_list:
-        # Open list if not open
-        if not in_list:
-            html_lines.append('    <ul>')
-            in_list = True
-        
-        # Determine if this is a sub-item (starts with 'o' or nested indicator)
-        is_subitem = (content.startswith('o ') or 
-                     content.startswith('○') or
-                     (prev_was_list and not content.startswith('•') and 
-                      not content.startswith('<strong>')))
-        
-        # Clean list markers
-        content = re.sub(r'^[•○o]\s*', '', content)
-        
-        # Add list item with proper indentation
-        if is_subitem and not content.startswith('<strong>'):
-            # Check if we need a nested list
-            if html_lines[-1].startswith('        <li>'):
-                # Already in nested list
-                html_lines.append(f'        <li>{content}</li>')
-            else:
-                # Start nested list
-                html_lines.append('        <ul>')
-                html_lines.append(f'            <li>{content}</li>')
+TITLE = 'Stat 301 - Exam 1 Preparations'
+
+HEAD = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <style>
+        body {{
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            max-width: 900px;
+            margin: 0 auto;
+            padding: 20px;
+            color: #333;
+            background-color: #fff;
+        }}
+        h1 {{
+            text-align: center;
+            color: #000;
+            margin-bottom: 1.5em;
+            font-size: 1.8em;
+        }}
+        h2 {{
+            margin-top: 1.5em;
+            margin-bottom: 0.5em;
+            color: #000;
+            font-size: 1.3em;
+        }}
+        p {{
+            margin: 0.8em 0;
+        }}
+        ul {{
+            margin: 0.8em 0;
+            padding-left: 2em;
+            list-style-type: disc;
+        }}
+        ul ul {{
+            list-style-type: circle;
+            margin: 0.3em 0;
+        }}
+        li {{
+            margin: 0.4em 0;
+        }}
+        strong {{
+            font-weight: bold;
+        }}
+        em {{
+            font-style: italic;
+        }}
+        a {{
+            color: #0066cc;
+            text-decoration: underline;
+        }}
+        a:hover {{
+            color: #004499;
+        }}
+        a:visited {{
+            color: #800080;
+        }}
+        .note {{
+            color: #0066cc;
+        }}
+        .important {{
+            color: #cc0000;
+        }}
+    </style>
+</head>
+<body>
+
+'''
+
+FOOT = '''
+</body>
+</html>'''
+
+# Elements whose whole content is Office noise (VML shapes, embedded XML, o:p fillers)
+SKIP_TAGS = {'o:p', 'xml', 'style', 'script', 'head', 'title'}
+LIST_MARKER = re.compile(r'^(?:[•○·§▪]|o(?= ))\s*')
+EMPTY_INLINE = re.compile(r'<(strong|em|sup|sub)></\1>')
+EDGE_BREAKS = re.compile(r'^(?:<br>\s*)+|(?:\s*<br>)+$')
+
+
+class WordHTMLCleaner(HTMLParser):
+    """Single-pass cleaner for Word-exported ("Web Page, Filtered") HTML.
+
+    Feed it the document in chunks; each paragraph is cleaned as its tags stream
+    past and written to `out` as soon as it ends, so memory stays constant no
+    matter how long the lecture is:
+
+      * MSO/VML/XML elements, comments and <![if ...]> ... <![endif]> sections
+        (list bullets, VML fallbacks) are dropped
+      * spans and other formatting tags are unwrapped; <b>/bold spans become
+        <strong>, <i> becomes <em>, <sup>/<sub> and vertical-align spans become
+        <sup>/<sub>; <br> is kept; links keep only their href; images become p̂
+      * MsoListParagraph* paragraphs become nested <ul> lists at their mso-list
+        level, written by list_writer.ListWriter
+      * a centered first paragraph becomes the <h1>; a paragraph starting with
+        bold text ending in a colon becomes an <h2>
+    """
+
+    def __init__(self, out):
+        super().__init__(convert_charrefs=True)
+        self.out = out
+        self.skip_depth = 0         # inside SKIP_TAGS / v:* elements
+        self.cond_depth = 0         # inside <![if ...]> sections
+        self.in_body = False
+        self.para = None            # pieces of the paragraph being read
+        self.para_attrs = {}
+        self.close_stack = []       # per open <b>/<span>/<sup>/<sub>: the closing tags it owes
+        self.italic_stack = 0
+        self.link_open = 0
+        self.blocks = 0             # paragraphs written so far
+        self.lists = ListWriter(out)
+
+    # --- tokenizer events ---
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS or tag.startswith('v:'):
+            self.skip_depth += 1
+            return
+        if tag == 'body':
+            self.in_body = True
+            return
+        if self.skip_depth or self.cond_depth or not self.in_body:
+            return
+        attrs_dict = dict(attrs)
+        if tag == 'p':
+            self._end_para()
+            self.para = []
+            self.para_attrs = attrs_dict
+            return
+        if self.para is None:
+            return
+
+        # Handle bold
+        if tag in ['b', 'strong']:
+            self.close_stack.append('</strong>')
+            self.para.append('<strong>')
+        elif tag in ['sup', 'sub']:
+            self.close_stack.append(f'</{tag}>')
+            self.para.append(f'<{tag}>')
+        elif tag == 'span':
+            # bold and superscript/subscript spans (s<sup>2</sup>, x<sub>i</sub>)
+            style = (attrs_dict.get('style') or '').replace(' ', '')
+            opened = []
+            if 'font-weight:bold' in style:
+                opened.append('strong')
+            if 'vertical-align:super' in style:
+                opened.append('sup')
+            elif 'vertical-align:sub' in style:
+                opened.append('sub')
+            self.close_stack.append(''.join(f'</{t}>' for t in reversed(opened)))
+            self.para.extend(f'<{t}>' for t in opened)
+
+        # Handle italic
+        elif tag in ['i', 'em']:
+            self.italic_stack += 1
+            self.para.append('<em>')
+
+        # Preserve links
+        elif tag == 'a' and attrs_dict.get('href'):
+            self.link_open += 1
+            self.para.append(f'<a href="{escape(attrs_dict["href"])}">')
+
+        # Remove images but keep placeholder for math symbols
+        elif tag == 'img':
+            self.para.append('p̂')
+
+        # Keep line breaks
+        elif tag == 'br':
+            self.para.append('<br>')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in SKIP_TAGS or tag.startswith('v:'):
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in ('img', 'br'):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS or tag.startswith('v:'):
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if tag == 'body':
+            self._end_para()
+            self.in_body = False
+            return
+        if self.skip_depth or self.cond_depth or self.para is None:
+            return
+        if tag == 'p':
+            self._end_para()
+        elif tag in ['b', 'strong', 'span', 'sup', 'sub']:
+            if self.close_stack:
+                self.para.append(self.close_stack.pop())
+        elif tag in ['i', 'em']:
+            if self.italic_stack:
+                self.italic_stack -= 1
+                self.para.append('</em>')
+        elif tag == 'a' and self.link_open:
+            self.link_open -= 1
+            self.para.append('</a>')
+
+    def handle_data(self, data):
+        if self.para is not None and not (self.skip_depth or self.cond_depth):
+            self.para.append(escape(data, quote=False))
+
+    def handle_comment(self, data):
+        pass    # includes <!--[if gte vml 1]> ... <![endif]--> blocks
+
+    def unknown_decl(self, data):
+        # <![if !supportLists]> ... <![endif]> and friends
+        if data.startswith('if'):
+            self.cond_depth += 1
+        elif data.startswith('endif'):
+            self.cond_depth = max(0, self.cond_depth - 1)
+
+    def close(self):
+        super().close()
+        self._end_para()
+        self.lists.close()
+
+    # --- output ---
+
+    def _end_para(self):
+        if self.para is None:
+            return
+        # close whatever the paragraph left open
+        self.para.extend(reversed(self.close_stack))
+        self.para.extend('</em>' for _ in range(self.italic_stack))
+        self.para.extend('</a>' for _ in range(self.link_open))
+        self.close_stack, self.italic_stack, self.link_open = [], 0, 0
+        content = re.sub(r'\s+', ' ', ''.join(self.para)).strip()
+        content = EDGE_BREAKS.sub('', EMPTY_INLINE.sub('', content).strip())
+        attrs, self.para = self.para_attrs, None
+        if content:
+            self._emit(content, attrs)
+
+    def _emit(self, content, attrs):
+        cls = attrs.get('class') or ''
+        style = (attrs.get('style') or '').replace(' ', '')
+        is_list = 'MsoListParagraph' in cls
+        is_centered = 'text-align:center' in style or attrs.get('align') == 'center'
+        first = self.blocks == 0
+        self.blocks += 1
+
+        # First item - make it the title
+        if first and is_centered:
+            title_text = re.sub(r'</?strong>', '', content)
+            self.out.write(f'    <h1>{title_text}</h1>\n\n')
+            return
+
+        if is_list:
+            level = list_level(attrs.get('style'), 2 if content.startswith(('o ', '○')) else 1)
+            self.lists.item(level, LIST_MARKER.sub('', content))
+            return
+
+        self.lists.close()
+        # Check if this is a heading (bold text ending with colon)
+        if content.startswith('<strong>') and ':</strong>' in content:
+            heading_text = re.sub(r'<strong>(.*?):</strong>', r'\1', content, count=1)
+            heading_text = re.sub(r'</?strong>', '', heading_text).strip()
+            self.out.write(f'    <h2>{heading_text}</h2>\n\n')
         else:
-            # Close nested list if it was open
-            if html_lines[-1].startswith('            <li>'):
-                html_lines.append('        </ul>')
-            
-            html_lines.append(f'        <li>{content}</li>')
-        
-        prev_was_list = True
-        
-    # Handle regular paragraph
-    else:
-        # Close nested list if open
-        if in_list and html_lines[-1].startswith('            <li>'):
-            html_lines.append('        </ul>')
-        
-        # Close main list if open
-        if in_list:
-            html_lines.append('    </ul>')
-            html_lines.append('')
-            in_list = False
-        
-        # Add paragraph
-        if content.strip():
-            html_lines.append(f'    <p>{content}</p>')
-        
-        prev_was_list = False
-
-# Close any open lists
-if in_list:
-    if html_lines[-1].startswith('            <li>'):
-        html_lines.append('        </ul>')
-    html_lines.append('    </ul>')
-
-html_lines.extend([
-    '',
-    '</body>',
-    '</html>'
-])
-
-# Write output
-output_html = '\n'.join(html_lines)
-
-# Fix encoding issues
-replacements = {
-    '–': '–',
-    ''': "'",
-    '"': '"',
-    '"': '"',
-    '≤': '≤',
-    '≥': '≥',
-    'π': 'π',
-    '😊': '😊',
-    '×': '×',
-    '±': '±'
-}
-
-for old, new in replacements.items():
-    output_html = output_html.replace(old, new)
-
-with open(output_file, 'w', encoding='utf-8') as f:
-    f.write(output_html)
-
-print(f"Successfully created clean HTML with proper list structure!")
-print(f"Output file: {output_file}")
-print(f"Processed {len(processed)} content blocks")
+            self.out.write(f'    <p>{content}</p>\n')
+
+
+def clean(src, out, title=TITLE, chunk_size=1 << 16):
+    """Stream Word HTML from file object `src` into cleaned HTML on `out`; returns blocks.
+
+    Mojibake pasted into the document ('â€™' and friends) is repaired on the way out.
+    """
+    out.write(HEAD.format(title=escape(title)))
+    repaired = RepairWriter(out)
+    cleaner = WordHTMLCleaner(repaired)
+    for chunk in iter(lambda: src.read(chunk_size), ''):
+        cleaner.feed(chunk)
+    cleaner.close()
+    repaired.close()
+    out.write(FOOT)
+    return cleaner.blocks
+
+
+if __name__ == '__main__':
+    with open(input_file, 'r', encoding='windows-1252') as src, \
+         open(output_file, 'w', encoding='utf-8') as out:
+        blocks = clean(src, out)
+
+    print("Successfully created clean HTML with proper list structure!")
+    print(f"Output file: {output_file}")
+    print(f"Processed {blocks} content blocks")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Clean a whole folder of Word-exported lecture HTML in one command.
+
+Takes directories and/or glob patterns, cleans every Word HTML file found with
+clean_html_final.py's WordHTMLCleaner (or make_cleaned2.py's cleaner with
+--cleaner cleaned2), which also repair mojibake (mojibake.py) as they write, and
+writes <name>_clean.html (or <name>_cleaned2.html) next to the input or into
+--out-dir.
+Files are cleaned in parallel, one process per core. An input whose output is
+newer than it is skipped (--force to redo it). A summary manifest is written
+to clean-manifest.json in the output folder.
+
+    python clean_lectures.py "c:/.../Stat 301 - Win 26/lectures"
+    python clean_lectures.py "lectures/review*.html" --out-dir cleaned --jobs 4
+    python clean_lectures.py lectures --cleaner cleaned2 --force
+"""
+import argparse
+import codecs
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+CLEANERS = {'final': '_clean', 'cleaned2': '_cleaned2'}
+OUTPUT_SUFFIXES = tuple(CLEANERS.values())
+CHARSET = re.compile(rb'charset\s*=\s*["\']?([\w-]+)', re.I)
+
+
+def find_inputs(specs):
+    """Word HTML files named by directories and/or glob patterns (our outputs excluded)."""
+    found = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            paths = glob.glob(os.path.join(spec, '*.htm')) + glob.glob(os.path.join(spec, '*.html'))
+        else:
+            paths = glob.glob(spec)
+        for path in sorted(paths):
+            stem = os.path.splitext(os.path.basename(path))[0]
+            if os.path.isfile(path) and not stem.endswith(OUTPUT_SUFFIXES) and path not in found:
+                found.append(path)
+    return found
+
+
+def sniff_encoding(path):
+    """The charset the export declares (Word writes a <meta> for it), else windows-1252."""
+    with open(path, 'rb') as f:
+        m = CHARSET.search(f.read(4096))
+    if m:
+        try:
+            return codecs.lookup(m.group(1).decode('ascii')).name
+        except LookupError:
+            pass
+    return 'windows-1252'
+
+
+def clean_one(job):
+    """Clean one file; returns its manifest entry. Top-level so it can run in a worker process."""
+    src, dst, cleaner = job
+    t0 = time.perf_counter()
+    entry = {'input': src, 'output': dst, 'cleaner': cleaner}
+    tmp = f'{dst}.{os.getpid()}.tmp'
+    try:
+        encoding = sniff_encoding(src)
+        with open(src, 'r', encoding=encoding, errors='replace') as f, \
+             open(tmp, 'w', encoding='utf-8') as out:
+            if cleaner == 'cleaned2':
+                import make_cleaned2
+                entry['blocks'] = make_cleaned2.clean(f, out)
+            else:
+                import clean_html_final
+                entry['blocks'] = clean_html_final.clean(f, out)
+        os.replace(tmp, dst)
+        entry.update(status='cleaned', encoding=encoding,
+                     bytes_in=os.path.getsize(src), bytes_out=os.path.getsize(dst))
+    except Exception as exc:  # keep going; record the failure in the manifest
+        entry.update(status='error', message=f'{type(exc).__name__}: {exc}')
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    entry['seconds'] = round(time.perf_counter() - t0, 3)
+    return entry
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Clean Word-exported lecture HTML files in parallel.')
+    ap.add_argument('inputs', nargs='+', help='directories and/or glob patterns of Word HTML files')
+    ap.add_argument('--out-dir', help='write cleaned files here (default: next to each input)')
+    ap.add_argument('--cleaner', choices=sorted(CLEANERS), default='final',
+                    help='final = clean_html_final.py (default), cleaned2 = make_cleaned2.py')
+    ap.add_argument('--jobs', '-j', type=int, default=0, help='worker processes (default: one per core)')
+    ap.add_argument('--force', action='store_true', help='clean even if the output is newer than the input')
+    ap.add_argument('--manifest', help='manifest path (default: <out-dir or first input dir>/clean-manifest.json)')
+    args = ap.parse_args()
+
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        print('No Word HTML files found.')
+        return 1
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    entries, todo = [], []
+    for src in inputs:
+        stem = os.path.splitext(os.path.basename(src))[0]
+        dst = os.path.join(args.out_dir or os.path.dirname(src), stem + CLEANERS[args.cleaner] + '.html')
+        if not args.force and os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+            entries.append({'input': src, 'output': dst, 'cleaner': args.cleaner, 'status': 'skipped'})
+        else:
+            todo.append((src, dst, args.cleaner))
+
+    t0 = time.perf_counter()
+    jobs = min(args.jobs or os.cpu_count() or 1, len(todo))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            done = list(pool.map(clean_one, todo))
+    else:
+        done = [clean_one(job) for job in todo]
+    for entry in done:
+        note = entry.get('message') or f"{entry.get('blocks', 0)} blocks, {entry['seconds']} s"
+        print(f"{entry['status']:8} {os.path.basename(entry['input'])}  ({note})")
+    entries.extend(done)
+    entries.sort(key=lambda e: e['input'])
+
+    counts = {s: sum(e['status'] == s for e in entries) for s in ('cleaned', 'skipped', 'error')}
+    manifest = args.manifest or os.path.join(args.out_dir or os.path.dirname(inputs[0]) or '.',
+                                             'clean-manifest.json')
+    with open(manifest, 'w', encoding='utf-8') as f:
+        json.dump({'cleaner': args.cleaner, 'jobs': max(jobs, 1), **counts,
+                   'seconds': round(time.perf_counter() - t0, 2), 'files': entries}, f, indent=1)
+    print(f"{counts['cleaned']} cleaned, {counts['skipped']} up to date, {counts['error']} failed "
+          f"-> {manifest}")
+    return 1 if counts['error'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
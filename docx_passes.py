@@ -0,0 +1,248 @@
+"""
+Clean up finalreview.docx (or any Word document) in one open, one walk and one save.
+
+Each fix is a pass registered with @register: a function called with the walk
+and each paragraph in turn. Passes run in registration order on every
+paragraph, so a paragraph reaches a later pass already fixed by the earlier
+ones, just as if the fixes had been run one after another on the whole
+document:
+
+  bullets   manual Symbol/'o'/Wingdings bullets -> List Paragraph (fix_bullets.py)
+  headings  bold-prefixed paragraphs -> Heading 2 (+ Normal body) (add_h2_headings.py)
+  empty-h2  empty Heading 2 followed by bold text -> filled in (fix_h2_headings.py)
+
+The paragraph list is read once; passes insert and remove paragraphs through
+the walk so it never has to be rebuilt.
+
+    python docx_passes.py                           # all passes, in order
+    python docx_passes.py bullets headings
+    python docx_passes.py --file other.docx empty-h2
+"""
+import argparse
+from collections import Counter
+from copy import deepcopy
+
+import docx
+from docx.enum.style import WD_STYLE_TYPE
+from docx.shared import Inches
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+FILEPATH = r'c:\Users\bchance\Dropbox\My Documents\Classes\Stat 301 - Win 26\lectures\finalreview.docx'
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+PASSES = {}     # name -> pass function, in registration (= run) order
+
+
+def qn(tag):
+    """Create a qualified name in the w: namespace."""
+    return f'{{{W_NS}}}{tag}'
+
+
+def register(name):
+    def deco(fn):
+        PASSES[name] = fn
+        return fn
+    return deco
+
+
+class Walk:
+    """One pass over a document's paragraphs, read once into a list."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.paras = list(doc.paragraphs)
+        self.i = 0
+        self.next = 1
+        self.counts = Counter()
+        # p.style searches the whole styles part on every get and set; look each up once
+        styles = [s for s in doc.styles if s.type == WD_STYLE_TYPE.PARAGRAPH]
+        self.style_names = {s.style_id: s.name for s in styles}
+        self.style_ids = {s.name: s.style_id for s in styles}
+        default = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+        self.default_id = default.style_id if default is not None else None
+        self.default_name = default.name if default is not None else 'Normal'
+
+    def style(self, p):
+        """Name of `p`'s paragraph style (p.style.name, without the search)."""
+        return self.style_names.get(p._p.style, self.default_name)
+
+    def set_style(self, p, name):
+        """p.style = doc.styles[name], without the search."""
+        style_id = self.style_ids[name]
+        p._p.style = None if style_id == self.default_id else style_id
+
+    def prev(self):
+        """The paragraph before the current one (skipping removed ones), or None."""
+        for j in range(self.i - 1, -1, -1):
+            if self.paras[j]._element.getparent() is not None:
+                return self.paras[j]
+        return None
+
+    def insert_after(self, p, elem):
+        """Insert paragraph element `elem` after `p`; the walk does not visit it."""
+        p._element.addnext(elem)
+        self.paras.insert(self.next, Paragraph(elem, p._parent))
+        self.next += 1
+
+    def remove(self, p):
+        p._element.getparent().remove(p._element)
+
+    def run(self, passes):
+        while self.i < len(self.paras):
+            p = self.paras[self.i]
+            for fn in passes:
+                if p._element.getparent() is None:
+                    break       # removed by an earlier pass
+                fn(self, p)
+            self.i, self.next = self.next, self.next + 1
+
+
+def leading_bold(runs):
+    """Number of consecutive bold runs at the start."""
+    split_at = 0
+    for run in runs:
+        if not run.bold:
+            break
+        split_at += 1
+    return split_at
+
+
+# --- bullets ---
+
+# first character -> (level name, characters to strip, left indent, fonts to replace)
+BULLETS = {
+    '\xb7': ('dot', '\xb7\xa0 \t', 0.5, ('Symbol', 'Times New Roman', None)),
+    'o': ('o', 'o\xa0 \t', 1.0, ('Courier New', 'Times New Roman', None)),
+    '\xa7': ('wing', '\xa7\xa0 \t', 1.5, ('Wingdings', 'Times New Roman', None)),
+}
+
+
+@register('bullets')
+def fix_bullets(walk, p):
+    """Manual bullet characters -> List Paragraph at the bullet's indent, in Arial."""
+    t = p.text.strip()
+    if not t or t[0] not in BULLETS or (t[0] == 'o' and t[1:2] not in ('\xa0', ' ')):
+        return
+    if walk.style(p) != 'Normal':
+        return
+    kind, chars, indent, fonts = BULLETS[t[0]]
+
+    # Remove the bullet char and leading whitespace from the first run(s); the
+    # bullet is typically in its own run (Symbol font), followed by spacing
+    for run in p.runs:
+        stripped = run.text.lstrip(chars)
+        if stripped == run.text:
+            break
+        if stripped:
+            run.text = stripped
+            break
+        p._element.remove(run._element)
+
+    walk.set_style(p, 'List Paragraph')
+    p.paragraph_format.left_indent = Inches(indent)
+    for run in p.runs:
+        if run.font.name in fonts:
+            run.font.name = 'Arial'
+    walk.counts[kind] += 1
+
+
+# --- headings ---
+
+@register('headings')
+def bold_to_h2(walk, p):
+    """Bold-prefixed paragraph -> Heading 2; body text after the bold runs moves to a
+    Normal paragraph right after it."""
+    runs = p.runs
+    if not (runs and runs[0].bold and p.text.strip() and walk.style(p) != 'Heading 1'):
+        return
+    p_elem = p._element
+    split_at = leading_bold(runs)
+    body_text = ''.join(r.text for r in runs[split_at:]).strip()
+
+    if body_text:
+        # everything from the first non-bold run on (runs, hyperlinks, ...) is body
+        first_body = runs[split_at]._element
+        children = [c for c in p_elem if c.tag != qn('pPr')]
+        body_children = children[children.index(first_body):]
+
+        # New paragraph with the same properties, holding the body content
+        new_p_elem = deepcopy(p_elem)
+        for child in list(new_p_elem):
+            if child.tag != qn('pPr'):
+                new_p_elem.remove(child)
+        for child in body_children:
+            new_p_elem.append(child)        # moves it out of the heading
+
+        # Set new paragraph style to Normal
+        pPr = new_p_elem.find(qn('pPr'))
+        if pPr is None:
+            pPr = etree.SubElement(new_p_elem, qn('pPr'))
+            new_p_elem.insert(0, pPr)
+        pStyle = pPr.find(qn('pStyle'))
+        if pStyle is None:
+            pStyle = etree.SubElement(pPr, qn('pStyle'))
+        pStyle.set(qn('val'), 'Normal')
+
+        walk.insert_after(p, new_p_elem)
+
+    walk.set_style(p, 'Heading 2')
+    for run in p.runs:
+        run.bold = True
+        run.font.name = 'Arial'
+    walk.counts['headings'] += 1
+    print(f"  P{walk.i}: -> H2: {p.text.strip()[:60]!r}")
+
+
+@register('empty-h2')
+def fill_empty_h2(walk, p):
+    """Empty Heading 2 before a bold-prefixed paragraph -> takes the bold runs as its
+    text; the paragraph keeps the rest, or is removed if nothing is left."""
+    h2 = walk.prev()
+    if h2 is None or walk.style(h2) != 'Heading 2' or h2.text.strip():
+        return
+    runs = p.runs
+    if not runs or not runs[0].bold:
+        return
+    for run in runs[:leading_bold(runs)]:
+        h2._element.append(run._element)    # moves (not copies) the run
+    if not p.text.strip():
+        walk.remove(p)
+    walk.counts['empty-h2'] += 1
+    print(f"  Fixed H2 from P{walk.i}: '{h2.text.strip()[:60]}'")
+
+
+def transform(path, names=None, out=None):
+    """Run the named passes (default: all) over `path` and save to `out` (default: in place).
+
+    Returns the counts the passes recorded.
+    """
+    passes = [PASSES[name] for name in (names or PASSES)]
+    doc = docx.Document(path)
+    walk = Walk(doc)
+    walk.run(passes)
+    doc.save(out or path)
+    return walk.counts
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Run clean-up passes over a Word document in one walk.')
+    ap.add_argument('passes', nargs='*', metavar='pass',
+                    help=f"passes to run, always in registration order (default: all of {', '.join(PASSES)})")
+    ap.add_argument('--file', default=FILEPATH, help='document to transform (default: finalreview.docx)')
+    ap.add_argument('--out', help='save here instead of overwriting --file')
+    args = ap.parse_args()
+    unknown = set(args.passes) - set(PASSES)
+    if unknown:
+        ap.error(f"unknown pass(es): {', '.join(sorted(unknown))}")
+
+    names = [name for name in PASSES if name in args.passes] or None
+    counts = transform(args.file, names, args.out)
+    summary = ', '.join(f'{n} {kind}' for kind, n in counts.items()) or 'nothing to fix'
+    print(f"\n{sum(counts.values())} paragraphs fixed ({summary})")
+    print(f"Saved to: {args.out or args.file}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
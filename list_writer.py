@@ -0,0 +1,81 @@
+"""
+Streaming nested-list writer for the lecture cleaners.
+
+Word exports a bulleted list as a flat run of MsoListParagraph paragraphs, each
+tagged with its level in the mso-list style ('mso-list:l0 level2 lfo1').
+ListWriter turns that run into nested <ul>s as the items arrive and writes every
+line to the file handle straight away. All it keeps is one flag per open <ul>,
+so a lecture with thousands of list items costs no more memory than one with ten.
+
+    lists = ListWriter(out)
+    lists.item(1, 'Parameters')
+    lists.item(2, 'mean')           # opens a <ul> inside the "Parameters" <li>
+    lists.item(1, 'Statistics')     # ... and closes it again
+    lists.close()                   # before writing anything that is not an item
+"""
+import re
+
+LIST_LEVEL = re.compile(r'mso-list:\s*\S+\s+level(\d+)')
+
+
+def list_level(style, default=1):
+    """Nesting level in a Word paragraph's mso-list style, else `default`."""
+    m = LIST_LEVEL.search(style or '')
+    return int(m.group(1)) if m else default
+
+
+class ListWriter:
+    """Write list items at Word levels 1, 2, 3, ... as nested <ul> lists on `out`.
+
+    A sublist goes inside the <li> before it; an item that skips a level gets an
+    empty parent <li>. Top-level <ul>s are indented one `indent` step and
+    followed by a blank line.
+    """
+
+    def __init__(self, out, indent='    '):
+        self.out = out
+        self.indent = indent
+        self.li_open = []           # per open <ul>: is an <li> open in it?
+        self.line_open = False      # last <li> line still waiting for its </li>
+
+    @property
+    def depth(self):
+        return len(self.li_open)
+
+    def item(self, level, content):
+        level = max(1, level)
+        self.close(level)
+        while self.depth < level:
+            if self.depth and not self.li_open[-1]:
+                self._line(2 * self.depth, '<li>')    # skipped a level: give the sublist a parent
+                self.li_open[-1] = True
+            self._line(2 * self.depth + 1, '<ul>')
+            self.li_open.append(False)
+        if self.li_open[-1]:
+            self._end_li()
+        self._line(2 * self.depth, f'<li>{content}', end='')
+        self.li_open[-1] = True
+
+    def close(self, level=0):
+        """Close open lists until only `level` remain (an item at `level` may follow)."""
+        while self.depth > level:
+            if self.li_open[-1]:
+                self._end_li()
+            self.li_open.pop()
+            self._line(2 * self.depth + 1, '</ul>')
+            if not self.depth:
+                self.out.write('\n')
+
+    def _end_li(self):
+        if self.line_open:
+            self.out.write('</li>\n')
+            self.line_open = False
+        else:
+            self._line(2 * self.depth, '</li>')
+
+    def _line(self, indent, text, end='\n'):
+        """Write `text` indented `indent` steps; end='' leaves the line open for </li>."""
+        if self.line_open:
+            self.out.write('\n')
+        self.out.write(self.indent * indent + text + end)
+        self.line_open = not end
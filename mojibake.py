@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Repair mojibake: UTF-8 text that was decoded as windows-1252 ('â€™' for '’').
+
+One compiled regex finds, in a single left-to-right pass, either
+
+  * any double-encoded UTF-8 sequence, generically: a windows-1252 character of
+    a UTF-8 lead byte followed by the right number of continuation-byte
+    characters, which is re-encoded and decoded as UTF-8 ('Ã—' -> '×',
+    'ðŸ˜Š' -> '😊', 'â€œ' -> '“'), or
+  * one of PAIRS, the lossy sequences that can no longer be decoded because a
+    byte was dropped or mangled on the way ('â€"' -> '–', 'â€' -> '"')
+
+so every character is looked at once and replacements can never overlap.
+
+The generic rule has a false-positive risk: legitimate text can have the same
+shape ('Fuß”' would decode to 'Fuߔ', 'A×±B' to 'AױB'). A generic sequence is
+therefore only repaired when it decodes to a character these exports actually
+contain (see expected()): Latin-1, Greek, punctuation, super/subscripts, arrows,
+math and other symbols, emoji. Any other sequence is left as it is; the check
+prints it for a human to look at, and --fix does not touch it.
+
+Used by the lecture cleaners (clean_html_final.py, make_cleaned2.py,
+fix_encoding.py). Run directly, it checks text files for mojibake — by default
+everything under source/ and data/ — and exits 1 if it finds any, so it can be
+a pre-commit check:
+
+    python mojibake.py                      # check source/ and data/
+    python mojibake.py --fix source/ch-5-1.ptx
+    python mojibake.py $(git diff --cached --name-only)   # e.g. in .git/hooks/pre-commit
+"""
+import argparse
+import os
+import re
+import unicodedata
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATHS = [os.path.join(REPO, 'source'), os.path.join(REPO, 'data')]
+
+
+def _char(b):
+    """The character windows-1252 decodes byte `b` to (latin-1 for its five holes)."""
+    try:
+        return bytes([b]).decode('cp1252')
+    except UnicodeDecodeError:
+        return chr(b)
+
+
+_TO_BYTE = {_char(b): b for b in range(0x80, 0x100)}
+
+
+def _class(lo, hi):
+    return '[' + ''.join(re.escape(_char(b)) for b in range(lo, hi + 1)) + ']'
+
+
+_CONT = _class(0x80, 0xBF)
+GENERIC = (f'{_class(0xC2, 0xDF)}{_CONT}'
+           f'|{_class(0xE0, 0xEF)}{_CONT}{{2}}'
+           f'|{_class(0xF0, 0xF4)}{_CONT}{{3}}')
+
+# Explicit repairs, as they have turned up in lecture exports. Pairs of three or
+# more characters win over generic decoding (the lecture pages want straight
+# quotes); shorter ones only apply where no generic sequence matches.
+PAIRS = {
+    'â€"': '–',     # en dash whose last byte was turned into a straight quote
+    'â€™': "'",
+    'â€œ': '"',
+    'â€': '"',      # right double quote whose last byte (0x9D) was dropped
+}
+
+
+def expected(ch):
+    """Is `ch` something a mis-decoded lecture export plausibly meant?"""
+    o = ord(ch)
+    return (0xA0 <= o <= 0xFF             # Latin-1 (é, ±, ×, nbsp)
+            or 0x370 <= o <= 0x3FF        # Greek (π, μ, σ)
+            or 0x2000 <= o <= 0x2BFF      # punctuation, sub/superscripts, arrows, math, dingbats
+            or unicodedata.category(ch) in ('Sm', 'So'))    # other symbols, emoji
+
+
+def _decode(s):
+    """The UTF-8 text `s` was mis-decoded from, or None if it is not valid UTF-8."""
+    try:
+        return bytes(_TO_BYTE[c] for c in s).decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+
+class Repairer:
+    """Single-pass repair of GENERIC sequences plus `pairs` (broken -> fixed)."""
+
+    def __init__(self, pairs=PAIRS):
+        self.pairs = dict(pairs)
+        ordered = sorted(self.pairs, key=len, reverse=True)
+        alts = [re.escape(p) for p in ordered if len(p) >= 3]
+        alts.append(f'(?P<gen>{GENERIC})')
+        alts += [re.escape(p) for p in ordered if len(p) < 3]
+        self.pattern = re.compile('|'.join(alts))
+        self.maxlen = max([4, *map(len, self.pairs)])
+
+    def _fix(self, m):
+        s = m.group(0)
+        if m.group('gen') is None:
+            return self.pairs[s]
+        decoded = _decode(s)
+        if decoded is None or not (decoded in self.pairs.values() or expected(decoded)):
+            return s                    # not valid UTF-8, or not a character we expect
+        return decoded
+
+    def repair(self, text):
+        return self.pattern.sub(self._fix, text)
+
+    def findings(self, text):
+        """(offset, broken, decoded, repaired?) for every mojibake-shaped sequence in
+        `text`; repaired? is False where repair() leaves it (an unexpected decoding)."""
+        found = []
+        for m in self.pattern.finditer(text):
+            s = m.group(0)
+            fixed = self._fix(m)
+            if fixed != s:
+                found.append((m.start(), s, fixed, True))
+            elif m.group('gen') is not None and _decode(s) is not None:
+                found.append((m.start(), s, _decode(s), False))
+        return found
+
+
+class RepairWriter:
+    """File-like wrapper that repairs text on its way to `out`, chunk by chunk.
+
+    The last few characters of each write are held back until the next write
+    (or close()), so a sequence split across two writes is still repaired.
+    close() flushes them but leaves `out` open.
+    """
+
+    def __init__(self, out, repairer=None):
+        self.out = out
+        self.repairer = repairer or default
+        self.tail = ''
+
+    def write(self, text):
+        buf = self.tail + text
+        # a match starting before `cut` lies wholly inside buf, so it is final
+        cut = len(buf) - self.repairer.maxlen + 1
+        parts, pos = [], 0
+        for m in self.repairer.pattern.finditer(buf):
+            if m.start() >= cut:
+                break
+            parts += (buf[pos:m.start()], self.repairer._fix(m))
+            pos = m.end()
+        if pos < cut:
+            parts.append(buf[pos:cut])
+            pos = cut
+        self.out.write(''.join(parts))
+        self.tail = buf[pos:]
+        return len(text)
+
+    def close(self):
+        self.out.write(self.repairer.repair(self.tail))
+        self.tail = ''
+
+
+default = Repairer()
+repair = default.repair
+
+
+def iter_files(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for name in sorted(files):
+                yield os.path.join(root, name)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Find (and fix) mojibake in UTF-8 text files.')
+    ap.add_argument('paths', nargs='*', help='files or directories (default: source/ and data/)')
+    ap.add_argument('--fix', action='store_true', help='rewrite files with the repairs applied')
+    args = ap.parse_args()
+
+    files = bad = suspect = 0
+    for path in iter_files(args.paths or DEFAULT_PATHS):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if b'\0' in data:
+            continue                    # binary
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            continue                    # not UTF-8: nothing to un-double
+        files += 1
+        if not default.pattern.search(text):
+            continue
+        found = default.findings(text)
+        for offset, broken, decoded, repaired in found:
+            line = text.count('\n', 0, offset) + 1
+            note = '' if repaired else '  (unexpected character: not repaired, check by hand)'
+            print(f'{os.path.relpath(path)}:{line}: {broken!r} -> {decoded!r}{note}')
+        suspect += sum(not repaired for *_, repaired in found)
+        if not any(repaired for *_, repaired in found):
+            continue
+        bad += 1
+        if args.fix:
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(default.repair(text))
+
+    if bad:
+        verb = 'fixed' if args.fix else 'found (run with --fix to repair)'
+        print(f'mojibake in {bad} of {files} file(s) {verb}')
+    if suspect:
+        print(f'{suspect} look-alike sequence(s) left alone')
+    return 1 if bad and not args.fix else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
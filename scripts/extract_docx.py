@@ -6,14 +6,21 @@ verify a .ptx matches it verbatim (see CLAUDE.md "Content Fidelity Mandate"), ex
 the doc's text and grep for the investigation you're working on.
 
 Usage (from repo root; write output to the scratchpad, not the repo):
-    unzip -o -q source/iscam4_RJMPFall25.docm word/document.xml -d "$SCRATCH/docm"
-    uv run --with lxml python scripts/extract_docx.py "$SCRATCH/docm/word/document.xml" "$SCRATCH/fulltext.txt"
+    uv run python scripts/extract_docx.py source/iscam4_RJMPFall25.docm "$SCRATCH/fulltext.txt"
     grep -n "Investigation 5.6" "$SCRATCH/fulltext.txt"     # then read that line range
+    # or stream straight into grep/less ("-" = stdout):
+    uv run python scripts/extract_docx.py source/iscam4_RJMPFall25.docm - | grep -n "Investigation 5.6"
+
+The input may be the .docx/.docm itself (word/document.xml is read straight out of
+the zip, no unzip step) or an already-extracted document.xml. The XML is streamed
+with iterparse: each paragraph is written as soon as it closes and then discarded,
+so memory stays bounded by the largest paragraph/table, not the whole book.
 
 One line per Word paragraph (<w:p>), tabs and soft line breaks preserved, so question
 order and the blank answer-lines that mark the *student* version stay visible.
 """
 import sys
+import zipfile
 import xml.etree.ElementTree as ET
 
 W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
@@ -31,16 +38,63 @@ def para_text(p) -> str:
     return "".join(parts)
 
 
+def iter_paragraphs(source):
+    """Yield each body paragraph's text in document order, streaming `source`.
+
+    Paragraphs nested inside another (text boxes) are yielded right after their
+    outer paragraph, whose text also includes them — the same order and content
+    as walking the parsed tree with body.iter(w:p).
+    """
+    stack = []          # open elements, root first
+    nested = []         # texts of paragraphs inside the current outer paragraph
+    p_depth = 0
+    for event, el in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(el)
+            if el.tag == W + "p":
+                p_depth += 1
+            continue
+        stack.pop()
+        if el.tag == W + "p":
+            p_depth -= 1
+            if p_depth:
+                nested.append(para_text(el))
+                continue
+            if len(stack) >= 2 and stack[1].tag == W + "body":
+                yield para_text(el)
+                yield from nested
+            nested.clear()
+            el.clear()
+        # drop finished top-level body blocks (paragraphs, tables, ...) entirely
+        if len(stack) == 2 and stack[1].tag == W + "body":
+            stack[1].remove(el)
+
+
+def open_document_xml(path: str):
+    """A binary stream of word/document.xml, from a .docx/.docm or a bare XML file."""
+    if zipfile.is_zipfile(path):
+        return zipfile.ZipFile(path).open("word/document.xml")
+    return open(path, "rb")
+
+
 def main() -> int:
     if len(sys.argv) != 3:
-        print("usage: extract_docx.py <document.xml> <out.txt>", file=sys.stderr)
+        print("usage: extract_docx.py <file.docx|file.docm|document.xml> <out.txt|->", file=sys.stderr)
         return 2
-    root = ET.parse(sys.argv[1]).getroot()
-    body = root.find(W + "body")
-    lines = [para_text(p) for p in body.iter(W + "p")]
-    with open(sys.argv[2], "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
-    print(f"wrote {len(lines)} paragraphs to {sys.argv[2]}")
+    src, dest = sys.argv[1], sys.argv[2]
+    out = sys.stdout if dest == "-" else open(dest, "w", encoding="utf-8")
+    n = 0
+    try:
+        with open_document_xml(src) as f:
+            for text in iter_paragraphs(f):
+                if n:
+                    out.write("\n")
+                out.write(text)
+                n += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"wrote {n} paragraphs to {dest}", file=sys.stderr if dest == "-" else sys.stdout)
     return 0
 
 
@@ -20,12 +20,22 @@ Usage (from repo root; write output to the scratchpad, not the repo):
     uv run --with lxml python scripts/extract_docx_images.py source/iscam4_RJMPFall25.docm "$SCRATCH/imgs" --filter "Investigation 5.7"
 
 Manifest is written to <out_dir>/manifest.tsv; extracted media to <out_dir>/.
+
+document.xml is streamed straight from the zip in one pass (iterparse), and media
+are copied out in chunks, so memory stays flat however many images the book has.
+Word often stores the same picture under several media names; those are detected
+from the zip directory (same CRC-32 and size), listed in the manifest's `same_as`
+column and extracted once. Files already in <out_dir> with matching content are
+not rewritten.
 """
+from __future__ import annotations
 import argparse
 import os
 import re
+import shutil
 import sys
 import zipfile
+import zlib
 import xml.etree.ElementTree as ET
 
 W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
@@ -49,20 +59,71 @@ def rid_to_media(z: zipfile.ZipFile) -> dict:
     return out
 
 
-def para_text(p) -> str:
-    return "".join(t.text or "" for t in p.iter(W + "t")).strip()
-
-
-def embeds_in(p):
-    """Yield rIds of images embedded in this paragraph, in order (DrawingML + VML)."""
-    for blip in p.iter(A + "blip"):
-        rid = blip.get(R + "embed") or blip.get(R + "link")
-        if rid:
-            yield rid
-    for img in p.iter(V + "imagedata"):
-        rid = img.get(R + "id")
-        if rid:
-            yield rid
+def walk_paragraphs(stream):
+    """Yield (text, [rId, ...]) for each top-level body paragraph, in reading order.
+
+    One streaming pass over document.xml: every node is visited once and classified
+    on the spot (w:t text, DrawingML blip, VML imagedata); finished paragraphs and
+    tables are cleared and detached so memory stays flat. Text and images of
+    paragraphs nested inside a paragraph (text boxes) belong to the outer one.
+    """
+    stack = []
+    depth = 0           # how many <w:p> are open
+    parts, rids = [], []
+    for event, el in ET.iterparse(stream, events=("start", "end")):
+        tag = el.tag
+        if event == "start":
+            stack.append(el)
+            if tag == W + "p":
+                depth += 1
+            elif depth and tag == A + "blip":
+                rid = el.get(R + "embed") or el.get(R + "link")
+                if rid:
+                    rids.append(rid)
+            elif depth and tag == V + "imagedata":
+                rid = el.get(R + "id")
+                if rid:
+                    rids.append(rid)
+            continue
+        stack.pop()
+        if tag == W + "t" and depth:
+            parts.append(el.text or "")
+        elif tag == W + "p":
+            depth -= 1
+            if not depth:
+                yield "".join(parts).strip(), rids
+                parts, rids = [], []
+        if not depth:
+            el.clear()
+            if len(stack) == 2 and stack[1].tag == W + "body":
+                stack[1].remove(el)
+
+
+def media_key(z: zipfile.ZipFile, member: str) -> tuple[int, int] | None:
+    """Content identity of a zip member from the central directory (CRC-32, size).
+
+    Lets identical images be recognised without decompressing either of them.
+    """
+    try:
+        info = z.getinfo(member)
+    except KeyError:
+        return None
+    return info.CRC, info.file_size
+
+
+def copy_media(z: zipfile.ZipFile, member: str, out: str) -> bool:
+    """Stream `member` to `out` in chunks; skip (return False) if `out` already matches."""
+    info = z.getinfo(member)
+    if os.path.exists(out) and os.path.getsize(out) == info.file_size:
+        crc = 0
+        with open(out, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                crc = zlib.crc32(chunk, crc)
+        if crc == info.CRC:
+            return False
+    with z.open(member) as src, open(out, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    return True
 
 
 def main() -> int:
@@ -75,50 +136,60 @@ def main() -> int:
 
     with zipfile.ZipFile(args.docm) as z:
         rmap = rid_to_media(z)
-        body = ET.fromstring(z.read("word/document.xml")).find(W + "body")
 
         rows = []
         cur_inv = "(front matter)"
         last_ctx = ""
-        for p in body.iter(W + "p"):
-            txt = para_text(p)
-            if txt:
-                if INV_RE.match(txt):
-                    cur_inv = txt[:70]
-                if Q_RE.match(txt) or PRACTICE_RE.match(txt):
-                    last_ctx = txt[:90]
-                elif not last_ctx:
-                    last_ctx = txt[:90]
-            for rid in embeds_in(p):
-                media = rmap.get(rid, "?")
-                # prefer the containing paragraph's own text if it has any, else last_ctx
-                ctx = (txt[:90] if txt else last_ctx)
-                rows.append((cur_inv, ctx, rid, media))
+        with z.open("word/document.xml") as doc:
+            for txt, rids in walk_paragraphs(doc):
+                if txt:
+                    if INV_RE.match(txt):
+                        cur_inv = txt[:70]
+                    if Q_RE.match(txt) or PRACTICE_RE.match(txt):
+                        last_ctx = txt[:90]
+                    elif not last_ctx:
+                        last_ctx = txt[:90]
+                for rid in rids:
+                    media = rmap.get(rid, "?")
+                    # prefer the containing paragraph's own text if it has any, else last_ctx
+                    ctx = (txt[:90] if txt else last_ctx)
+                    rows.append((cur_inv, ctx, rid, media))
+
+        # identical images stored under several media names -> first name seen
+        canonical: dict[tuple[int, int], str] = {}
+        same_as: dict[str, str] = {}
+        for _inv, _ctx, _rid, media in rows:
+            key = media_key(z, media)
+            if key is not None and media not in same_as:
+                same_as[media] = canonical.setdefault(key, media)
 
         # write manifest
         manifest = os.path.join(args.out_dir, "manifest.tsv")
         with open(manifest, "w", encoding="utf-8") as f:
-            f.write("idx\tinvestigation\tcontext\trId\tmedia\n")
+            f.write("idx\tinvestigation\tcontext\trId\tmedia\tsame_as\n")
             for i, (inv, ctx, rid, media) in enumerate(rows):
-                f.write(f"{i}\t{inv}\t{ctx}\t{rid}\t{media}\n")
-        print(f"{len(rows)} embedded images; manifest -> {manifest}")
+                dup = same_as.get(media, media)
+                f.write(f"{i}\t{inv}\t{ctx}\t{rid}\t{media}\t{dup if dup != media else ''}\n")
+        print(f"{len(rows)} embedded images ({len(canonical)} distinct); manifest -> {manifest}")
 
-        # extract matching media
+        # extract matching media (each distinct image once, under its canonical name)
         want = [r for r in rows if (args.filter is None or args.filter.lower() in r[0].lower())]
         seen = set()
+        written = 0
         for inv, ctx, rid, media in want:
+            media = same_as.get(media, media)
             if media in seen or media == "?":
                 continue
             seen.add(media)
-            data = z.read(media)
-            out = os.path.join(args.out_dir, os.path.basename(media))
-            with open(out, "wb") as f:
-                f.write(data)
-        print(f"extracted {len(seen)} media file(s) matching filter={args.filter!r} into {args.out_dir}")
+            written += copy_media(z, media, os.path.join(args.out_dir, os.path.basename(media)))
+        print(f"extracted {len(seen)} media file(s) matching filter={args.filter!r} into {args.out_dir} "
+              f"({written} written, {len(seen) - written} already up to date)")
         if args.filter:
             print("\n--- matching images (in reading order) ---")
             for inv, ctx, rid, media in want:
-                print(f"  {os.path.basename(media):20} | {inv[:38]:38} | {ctx}")
+                dup = same_as.get(media, media)
+                note = f" (= {os.path.basename(dup)})" if dup != media else ""
+                print(f"  {os.path.basename(media) + note:20} | {inv[:38]:38} | {ctx}")
     return 0
 
 
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""fingerprint_css.py — minify the book stylesheet and give it a content-hash name.
+
+Cache-busting used to mean copying the stylesheet to a new version
+(assets/iscam-v3.css ... iscam-v51.css) and bumping `html.css.extra` in
+project.ptx by hand. This post-build step does it automatically: it takes the
+stylesheet the target actually uses (project.ptx's html.css.extra), minifies
+it, writes it into the build as e.g. external/iscam.3f9a1c2b7d.css, and points
+every page of output/<target>/ at that file. The name changes exactly when the
+content does, so browsers and the Runestone CDN can cache it forever
+(preview_server.py serves such names as immutable). Edit the stylesheet in
+place; no new -vNN copy is needed.
+
+Usage (from repo root):
+    pretext build runestone
+    python scripts/fingerprint_css.py                    # output/runestone/
+    python scripts/fingerprint_css.py --target html --css external/iscam-v51.css
+    python scripts/fingerprint_css.py --check            # print the name/savings, change nothing
+
+Re-running after a rebuild or a CSS edit is safe: pages already pointing at an
+older fingerprint are repointed and the stale file is removed.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import os
+import re
+import xml.etree.ElementTree as ET
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT = os.path.join(REPO, "project.ptx")
+ASSETS = os.path.join(REPO, "assets")
+HASH_LEN = 10
+
+# one pass over the stylesheet: strings and comments are tokens of their own, so
+# nothing inside a string is ever touched
+RE_CSS_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|\s+|[^"\'/\s]+|/', re.S)
+TIGHT_BEFORE = set("{};,>)")     # no space needed before these ...
+TIGHT_AFTER = set("{};,>(:")     # ... or after these
+
+
+def stylesheet(target: str) -> str | None:
+    """html.css.extra of `target` in project.ptx (a path under the build, e.g. external/x.css)."""
+    root = ET.parse(PROJECT).getroot()
+    for t in root.iter("target"):
+        if t.get("name") == target:
+            for params in t.iter("stringparams"):
+                if params.get("html.css.extra"):
+                    return params.get("html.css.extra")
+    return None
+
+
+def minify(css: str) -> str:
+    """Drop comments (except /*! ... */) and redundant whitespace and semicolons."""
+    out: list[str] = []
+    for tok in RE_CSS_TOKEN.findall(css):
+        if tok.startswith("/*"):
+            if tok.startswith("/*!"):
+                out.append(tok)
+            continue
+        if tok.isspace():
+            if out and out[-1] != " ":
+                out.append(" ")
+            continue
+        if out and out[-1] == " " and (tok[0] in TIGHT_BEFORE or out[-2][-1] in TIGHT_AFTER):
+            out.pop()
+        if tok[0] not in "\"'":
+            tok = tok.replace(";}", "}")
+            if tok[0] == "}" and out and out[-1].endswith(";"):
+                out[-1] = out[-1][:-1]
+        out.append(tok)
+    return "".join(out).strip()
+
+
+def hashed_name(ref: str, data: bytes) -> str:
+    """external/iscam-v51.css + content -> external/iscam.<hash>.css."""
+    folder, name = os.path.split(ref)
+    stem = re.sub(r"-v\d+$", "", os.path.splitext(name)[0])
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+    return f"{folder}/{stem}.{digest}.css" if folder else f"{stem}.{digest}.css"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Minify + content-hash the book stylesheet in a build.")
+    ap.add_argument("--target", default="runestone", help="output/<target> dir (default: runestone)")
+    ap.add_argument("--css", help="stylesheet path as the pages reference it "
+                                  "(default: the target's html.css.extra in project.ptx)")
+    ap.add_argument("--check", action="store_true", help="report what would be written; change nothing")
+    args = ap.parse_args()
+
+    ref = args.css or stylesheet(args.target)
+    if not ref:
+        print(f"ERROR: target {args.target!r} has no html.css.extra in project.ptx; pass --css.")
+        return 2
+    source = os.path.join(ASSETS, ref.split("/", 1)[1]) if ref.startswith("external/") else os.path.join(REPO, ref)
+    with open(source, encoding="utf-8") as f:
+        original = f.read()
+    data = minify(original).encode("utf-8")
+    new_ref = hashed_name(ref, data)
+    print(f"{ref} -> {new_ref}  ({len(original.encode('utf-8')):,} -> {len(data):,} bytes)")
+    if args.check:
+        return 0
+
+    outdir = os.path.join(REPO, "output", args.target)
+    if not os.path.isdir(outdir):
+        print(f"ERROR: output/{args.target}/ does not exist — run `pretext build {args.target}` first.")
+        return 2
+    dest = os.path.join(outdir, new_ref)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with open(dest + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(dest + ".tmp", dest)
+
+    # the original name, or any earlier fingerprint of it, optionally with a ?query
+    name = os.path.basename(new_ref)
+    stem = name.split(".")[0]
+    old_names = {os.path.basename(ref), *(fn for fn in os.listdir(os.path.dirname(dest))
+                                         if re.fullmatch(rf"{re.escape(stem)}\.[0-9a-f]{{{HASH_LEN}}}\.css", fn))}
+    old_names.discard(name)
+    if not old_names:
+        print(f"pages already point at {new_ref}")
+        return 0
+    pattern = re.compile(r'(?<=["\'/])(' + "|".join(map(re.escape, sorted(old_names))) + r')(\?[^"\']*)?(?=["\'])')
+    pages = 0
+    for fn in sorted(os.listdir(outdir)):
+        if not fn.endswith(".html"):
+            continue
+        path = os.path.join(outdir, fn)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        new_text = pattern.sub(name, text)
+        if new_text != text:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(new_text)
+            os.replace(path + ".tmp", path)
+            pages += 1
+    for old in old_names - {os.path.basename(ref)}:
+        os.remove(os.path.join(os.path.dirname(dest), old))     # stale fingerprints
+    print(f"repointed {pages} page(s) at {new_ref}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+"""gold_index.py — jump straight to one Investigation in the Word/PDF gold source.
+
+Fidelity checks always start the same way: dump the whole gold source to text,
+then grep for "Investigation 5.6". This builds that text ONCE per source revision,
+together with an index of every Investigation, Practice Problem and question label
+((a), (b), ...) -> byte offsets in the text (and, for a PDF, page ranges), and
+keeps both under .gold-index/<source-name>/. Later queries seek straight to the
+slice. The index is rebuilt automatically when the source's content hash changes.
+
+Usage (from repo root; the index lives in .gold-index/, which is git-ignored):
+    # text of Investigation 5.6 from the Word source:
+    uv run python scripts/gold_index.py source/iscam4_RJMPFall25.docm --inv 5.6
+    # just question (c) of it, or one practice problem:
+    uv run python scripts/gold_index.py source/iscam4_RJMPFall25.docm --inv 5.6 --q c
+    uv run python scripts/gold_index.py source/iscam4_RJMPFall25.docm --practice 5.10A
+    # page range (+ text layer) in the PDF; feed the range to pdf_pages.py:
+    uv run --with pymupdf python scripts/gold_index.py source/iscam4_RJMPFall26.pdf --inv 5.6 --pages
+    # everything the index knows about:
+    uv run python scripts/gold_index.py source/iscam4_RJMPFall25.docm --list
+
+Several sources may be given at once (e.g. the .docm and the .pdf); each answers
+the same query. A heading that occurs more than once (e.g. in a table of
+contents) is indexed at the occurrence with the longest section.
+"""
+from __future__ import annotations
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import re
+import sys
+
+for _stream in (sys.stdout, sys.stderr):
+    try:
+        _stream.reconfigure(encoding="utf-8", errors="replace")
+    except (AttributeError, ValueError):
+        pass
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_DIR = os.path.join(REPO, ".gold-index")
+INDEX_VERSION = 1   # bump when the marker regexes or the index layout change
+
+INV_RE = re.compile(r"^\s*Investigation\s+([A-Z0-9]+\.\d+)\s*:", re.I)
+PRACTICE_RE = re.compile(r"^\s*Practice Problem\s+([A-Z0-9]+\.\d+[A-Z]?)\b", re.I)
+Q_RE = re.compile(r"^\s*\(([a-z]|[ivx]+)\)")  # (a), (b), ... question labels
+
+
+def file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def iter_units(path: str):
+    """Yield (text, page_no | None) units of the source in reading order.
+
+    Word: one unit per paragraph (via extract_docx). PDF: one unit per page's text
+    layer (PyMuPDF), so each unit's page number is known.
+    """
+    if path.lower().endswith(".pdf"):
+        import fitz  # PyMuPDF
+
+        with fitz.open(path) as doc:
+            for i, page in enumerate(doc):
+                yield page.get_text(), i + 1
+    else:
+        from extract_docx import iter_paragraphs, open_document_xml
+
+        with open_document_xml(path) as f:
+            for text in iter_paragraphs(f):
+                yield text, None
+
+
+def build(path: str, text_path: str) -> dict:
+    """Write the source's text to `text_path` and return its index."""
+    marks: list[tuple[str, str, int, str, int | None]] = []  # (kind, key, offset, title, page)
+    page_starts: list[int] = []
+    offset = 0
+    inv = practice = None
+    with open(text_path, "wb") as out:
+        for unit, page in iter_units(path):
+            if page is not None:
+                page_starts.append(offset)
+            for line in unit.splitlines(keepends=True) or [""]:
+                if m := INV_RE.match(line):
+                    inv, practice = m.group(1), None
+                    marks.append(("investigation", inv, offset, line.strip()[:90], page))
+                elif m := PRACTICE_RE.match(line):
+                    practice = m.group(1)
+                    marks.append(("practice", practice, offset, line.strip()[:90], page))
+                elif (m := Q_RE.match(line)) and (inv or practice):
+                    owner = f"PP{practice}" if practice else inv
+                    marks.append(("question", f"{owner}({m.group(1)})", offset, line.strip()[:90], page))
+                data = line.encode("utf-8")
+                out.write(data)
+                offset += len(data)
+            if page is None:            # paragraphs are joined one per line
+                out.write(b"\n")
+                offset += 1
+            else:                       # pages are separated by a form feed
+                out.write(b"\f")
+                offset += 1
+    return {"entries": _spans(marks, offset, page_starts), "page_starts": page_starts, "size": offset}
+
+
+def _spans(marks: list, total: int, page_starts: list[int]) -> dict[str, dict]:
+    """Give each mark an end offset (next mark of equal or higher rank) and pages."""
+    rank = {"investigation": 0, "practice": 1, "question": 2}
+    entries: dict[str, dict] = {}
+    for i, (kind, key, start, title, _page) in enumerate(marks):
+        end = next((m[2] for m in marks[i + 1:] if rank[m[0]] <= rank[kind]), total)
+        entry = {"kind": kind, "title": title, "start": start, "end": end}
+        if page_starts:
+            entry["pages"] = [bisect.bisect_right(page_starts, start),
+                              bisect.bisect_right(page_starts, max(start, end - 1))]
+        ekey = f"{kind}:{key}"
+        old = entries.get(ekey)
+        if old is None or end - start > old["end"] - old["start"]:
+            entries[ekey] = entry
+    return entries
+
+
+def load(path: str, rebuild: bool = False) -> tuple[dict, str]:
+    """(index, text_path) for `path`, rebuilding only if the source changed."""
+    where = os.path.join(INDEX_DIR, os.path.basename(path))
+    index_path, text_path = os.path.join(where, "index.json"), os.path.join(where, "text.txt")
+    st = os.stat(path)
+    index = None
+    if not rebuild and os.path.exists(index_path) and os.path.exists(text_path):
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != INDEX_VERSION:
+            index = None
+        elif (index["mtime"], index["source_size"]) != (st.st_mtime_ns, st.st_size):
+            if index["sha1"] != file_sha1(path):
+                index = None
+            else:   # touched but unchanged: just refresh the stamp
+                index["mtime"], index["source_size"] = st.st_mtime_ns, st.st_size
+                _save(index_path, index)
+    if index is None:
+        os.makedirs(where, exist_ok=True)
+        print(f"indexing {path} (once per revision) ...", file=sys.stderr)
+        index = build(path, text_path)
+        index.update(version=INDEX_VERSION, source=os.path.abspath(path), sha1=file_sha1(path),
+                     mtime=st.st_mtime_ns, source_size=st.st_size)
+        _save(index_path, index)
+    return index, text_path
+
+
+def _save(path: str, index: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp, path)
+
+
+def read_slice(text_path: str, entry: dict) -> str:
+    with open(text_path, "rb") as f:
+        f.seek(entry["start"])
+        return f.read(entry["end"] - entry["start"]).decode("utf-8", errors="replace")
+
+
+def lookup(index: dict, inv: str | None, practice: str | None, q: str | None) -> tuple[str, dict | None]:
+    if practice:
+        key = f"question:PP{practice}({q})" if q else f"practice:{practice}"
+    else:
+        key = f"question:{inv}({q})" if q else f"investigation:{inv}"
+    return key, index["entries"].get(key)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Random access to Investigations in the gold source.")
+    ap.add_argument("sources", nargs="+", help=".docx/.docm and/or .pdf gold source(s)")
+    ap.add_argument("--inv", help="investigation number, e.g. 5.6")
+    ap.add_argument("--practice", help="practice problem, e.g. 5.10A")
+    ap.add_argument("--q", help="question label within --inv/--practice, e.g. c")
+    ap.add_argument("--pages", action="store_true", help="print only the page range (PDF sources)")
+    ap.add_argument("--list", action="store_true", help="list every indexed heading")
+    ap.add_argument("--rebuild", action="store_true", help="rebuild the index even if the source is unchanged")
+    args = ap.parse_args()
+    if not (args.inv or args.practice or args.list):
+        ap.error("give --inv, --practice or --list")
+
+    status = 0
+    for src in args.sources:
+        index, text_path = load(src, rebuild=args.rebuild)
+        if args.list:
+            for key, e in sorted(index["entries"].items(), key=lambda kv: kv[1]["start"]):
+                pages = "p.{}-{}  ".format(*e["pages"]) if "pages" in e else ""
+                kind, name = key.split(":", 1)
+                print(f"{os.path.basename(src)}  {pages}{kind:13} {name:12} {e['title']}")
+            continue
+        key, entry = lookup(index, args.inv, args.practice, args.q)
+        if entry is None:
+            print(f"{src}: no {key} in the index", file=sys.stderr)
+            status = 1
+            continue
+        if "pages" in entry:
+            print(f"== {src}  {key}  pages {entry['pages'][0]}-{entry['pages'][1]}")
+        else:
+            print(f"== {src}  {key}  bytes {entry['start']}-{entry['end']}")
+        if not args.pages:
+            print(read_slice(text_path, entry).replace("\f", "\n"))
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
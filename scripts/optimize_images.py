@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+"""optimize_images.py — right-size, recompress and srcset the book's images after a build.
+
+Most of assets/images are screenshots saved far wider than they are ever shown.
+PreTeXt copies them into the build untouched, so a page with a 70%-wide plot can
+ship a 2400 px PNG to a phone. This stage reads how wide each image is actually
+rendered — the <image width="..."> in the .ptx source (via ptx_lint's cached
+facts, only files reachable from main.ptx), as a fraction of the text column —
+and writes into the build, next to each copied original:
+
+  * the original format, downscaled to that width x --dpr (never upscaled) and
+    recompressed: PNG losslessly (optimize, exact palette when an opaque image has
+    <= 256 colours, checked pixel for pixel), JPEG at --quality; the original
+    bytes are kept if they are already smaller
+  * narrower copies for small screens, one per --widths step below that width,
+    named <source>.<w>w.<ext> (e.g. foo.png.720w.png)
+  * WebP copies of each (lossless for PNG/GIF sources) and, if this Pillow can
+    write AVIF, AVIF ones: <source>.webp, <source>.720w.webp, ...
+
+Then every <img> in output/<target>/*.html that shows one of these gets a srcset
+and sizes (wrapped in a <picture> offering the modern formats first), plus
+loading="lazy" on all but the page's first image, so phones fetch a copy the size
+of their screen instead of the full file. Pages are only rewritten once (an <img>
+that already has a srcset is left alone).
+
+Results are cached in .image-cache/ by content hash + width + settings, so a rerun
+(or a rebuild with unchanged images) only copies files.
+
+Prereqs (optional build tool): uv pip install pillow
+Usage (from repo root):
+    pretext build runestone
+    uv run python scripts/optimize_images.py                 # rewrites output/runestone/
+    uv run python scripts/optimize_images.py --dry-run       # just print each image's widths
+    uv run python scripts/optimize_images.py --target html --jobs 4 --column 696 --dpr 2
+    uv run python scripts/optimize_images.py --widths 480,960 --no-html
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import html
+import math
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote, unquote
+
+import ptx_lint
+
+REPO = ptx_lint.REPO
+CACHE_DIR = os.path.join(REPO, ".image-cache")
+SETTINGS_VERSION = 2    # bump when the encoders or their settings change
+RASTER_EXTS = (".png", ".jpg", ".jpeg", ".gif")
+COLUMN_PX = 696         # .ptx-content max-width in the active stylesheet
+WIDTH_STEPS = (360, 720, 1080)
+RE_WIDTH = re.compile(r"\s*(\d+(?:\.\d+)?)\s*(%|px)?\s*$")
+RE_IMG = re.compile(r"<img\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>", re.I)
+MIME = {"webp": "image/webp", "avif": "image/avif"}
+
+
+def rendered_widths(column: int) -> dict[str, int]:
+    """asset path (as on disk, relative to assets/) -> widest CSS px it is shown at.
+
+    An <image> without a width fills the column; an image used several times gets
+    the largest of its widths.
+    """
+    cache = ptx_lint.FactCache(ptx_lint.CACHE_FILE)
+    index: dict[str, ptx_lint.Facts] = {}
+    ptx_lint.resolve_includes(ptx_lint.MAIN, index, cache)
+    cache.save()
+    assets = ptx_lint.AssetIndex(ptx_lint.ASSETS)
+    widths: dict[str, int] = {}
+    for facts in index.values():
+        for source, width in facts.image_widths:
+            path = assets.lookup(source)
+            if path is None or not path.lower().endswith(RASTER_EXTS):
+                continue
+            m = RE_WIDTH.match(width) if width else None
+            if m is None:
+                css_px = column
+            elif m.group(2) == "px":
+                css_px = float(m.group(1))
+            else:
+                css_px = column * min(float(m.group(1)), 100) / 100
+            widths[path] = max(widths.get(path, 0), math.ceil(css_px))
+    return widths
+
+
+def ladder(target: int, natural: int, steps: tuple[int, ...]) -> list[int]:
+    """Pixel widths to produce, widest last: the steps below `target`, then `target`.
+
+    Nothing is wider than the image itself (`natural`).
+    """
+    top = min(target, natural)
+    return sorted({w for w in steps if w < top} | {top})
+
+
+def variant_path(source: str, fmt: str | None = None, width: int | None = None) -> str:
+    """Build-relative name of a variant: foo.png -> foo.png.webp, foo.png.480w.png, ..."""
+    suffix = f".{width}w" if width else ""
+    ext = f".{fmt}" if fmt else os.path.splitext(source)[1]
+    return source + suffix + ext if (fmt or width) else source
+
+
+def file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def modern_formats() -> tuple[str, ...]:
+    from PIL import features
+
+    fmts = ["webp"] if features.check("webp") else []
+    try:
+        if features.check("avif"):
+            fmts.append("avif")
+    except ValueError:      # Pillow without an AVIF feature flag at all
+        pass
+    return tuple(fmts)
+
+
+def encode(job: tuple[str, tuple[int, ...], int, tuple[str, ...], str]) -> bool:
+    """Write the resized/recompressed copies of one image as `base`-<w>w.* (atomically).
+
+    job = (source path, pixel widths, jpeg quality, modern formats, cache base).
+    Returns False for an animation, which is left as it is. Top-level so it can run
+    in a worker process.
+    """
+    from PIL import Image
+
+    src, widths, quality, fmts, base = job
+    ext = os.path.splitext(src)[1].lower()
+    lossless = ext not in (".jpg", ".jpeg")
+
+    def save(img, path: str, fmt: str, **kw) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        img.save(tmp, format=fmt, **kw)
+        os.replace(tmp, path)
+
+    def save_lossless(img, path: str) -> None:
+        fmt = "GIF" if ext == ".gif" else "PNG"
+        colors = None if img.mode == "RGBA" else img.getcolors(256)
+        if not colors:                          # alpha or > 256 colours: keep the pixels as they are
+            save(img, path, fmt, optimize=True)
+            return
+        # a palette of exactly the image's colours (padded with the first), mapped
+        # without dithering, so every pixel keeps its value
+        rgb = [c for _count, color in colors for c in color]
+        palette = Image.new("P", (1, 1))
+        palette.putpalette(rgb + rgb[:3] * (256 - len(colors)))
+        save(img.quantize(palette=palette, dither=Image.Dither.NONE), path, fmt, optimize=True)
+        with Image.open(path) as check:
+            if check.convert(img.mode).tobytes() != img.tobytes():
+                save(img, path, fmt, optimize=True)
+
+    with Image.open(src) as im:
+        if getattr(im, "is_animated", False):   # leave animations alone
+            return False
+        alpha = "A" in im.getbands() or "transparency" in im.info
+        full = im.convert("RGBA" if alpha and lossless else "RGB")
+    for width in widths:                        # each one resampled from the original
+        im = full
+        if im.width > width:
+            im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+        prefix = f"{base}-{width}w"
+        if lossless:
+            save_lossless(im, f"{prefix}{ext}")
+        else:
+            save(im, f"{prefix}{ext}", "JPEG", quality=quality, optimize=True, progressive=True)
+        for fmt in fmts:
+            path = f"{prefix}.{fmt}"
+            if fmt == "avif":
+                save(im, path, "AVIF", quality=max(quality - 25, 40))
+            elif lossless:
+                save(im, path, "WEBP", lossless=True, method=4)
+            else:
+                save(im, path, "WEBP", quality=quality - 5, method=4)
+    return True
+
+
+def rewrite_html(outdir: str, images: dict[str, tuple[list[int], int, tuple[str, ...]]],
+                 column: int) -> tuple[int, int]:
+    """Add srcset/sizes/lazy loading to the <img>s of every page in `outdir`.
+
+    `images` maps asset path -> (pixel widths written, CSS px shown at, formats).
+    Returns (pages rewritten, <img>s rewritten).
+    """
+    assets = ptx_lint.AssetIndex(os.path.join(outdir, "external"))
+    pages = imgs = 0
+    for name in sorted(os.listdir(outdir)):
+        if not name.endswith(".html"):
+            continue
+        path = os.path.join(outdir, name)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        seen = 0
+
+        def sub(m: re.Match) -> str:
+            nonlocal seen, imgs
+            tag = m.group(0)
+            seen += 1
+            attrs = {a.group(1).lower(): a.group(2) if a.group(2) is not None else a.group(3)
+                     for a in ptx_lint.RE_ATTR.finditer(tag)}
+            src = html.unescape(attrs.get("src", ""))
+            if "srcset" in attrs or not src.startswith("external/"):
+                return tag
+            asset = assets.lookup(unquote(src[len("external/"):]))
+            if asset not in images:
+                return tag
+            widths, css_px, fmts = images[asset]
+
+            def srcset(fmt: str | None) -> str:
+                return ", ".join(f"external/{quote(variant_path(asset, fmt, None if w == widths[-1] else w))} {w}w"
+                                 for w in widths)
+
+            sizes = f"(max-width: {column}px) {round(100 * css_px / column)}vw, {css_px}px"
+            extra = f' srcset="{srcset(None)}" sizes="{sizes}"'
+            if "loading" not in attrs and seen > 1:   # the first image is likely above the fold
+                extra += ' loading="lazy"'
+            if "decoding" not in attrs:
+                extra += ' decoding="async"'
+            end = len(tag) - (2 if tag.endswith("/>") else 1)
+            new = tag[:end].rstrip() + extra + tag[end:]
+            imgs += 1
+            if not fmts:
+                return new
+            sources = "".join(f'<source type="{MIME[fmt]}" srcset="{srcset(fmt)}" sizes="{sizes}"/>'
+                              for fmt in reversed(fmts))      # best format first
+            return f"<picture>{sources}{new}</picture>"
+
+        new_text = RE_IMG.sub(sub, text)
+        if new_text != text:
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(new_text)
+            os.replace(tmp, path)
+            pages += 1
+    return pages, imgs
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Right-size, recompress and srcset built images (cached).")
+    ap.add_argument("--target", default="runestone", help="output/<target> dir (default: runestone)")
+    ap.add_argument("--column", type=int, default=COLUMN_PX,
+                    help=f"CSS px of a 100%% wide image (text column; default {COLUMN_PX})")
+    ap.add_argument("--dpr", type=float, default=2.0, help="device pixel ratio to serve (default 2)")
+    ap.add_argument("--widths", default=",".join(map(str, WIDTH_STEPS)), metavar="W,W,...",
+                    help=f"smaller pixel widths for srcset (default {','.join(map(str, WIDTH_STEPS))})")
+    ap.add_argument("--quality", type=int, default=85, help="JPEG quality (default 85)")
+    ap.add_argument("--jobs", "-j", type=int, default=0, metavar="N",
+                    help="encode in N processes (default 0 = one per CPU)")
+    ap.add_argument("--no-html", action="store_true", help="only write the images; leave the pages alone")
+    ap.add_argument("--dry-run", action="store_true", help="print each image's widths and stop")
+    args = ap.parse_args()
+    steps = tuple(sorted({int(w) for w in args.widths.split(",") if w.strip()}))
+
+    outdir = os.path.join(REPO, "output", args.target)
+    if not args.dry_run and not os.path.isdir(os.path.join(outdir, "external")):
+        print(f"ERROR: output/{args.target}/external/ does not exist — run `pretext build {args.target}` first.")
+        return 2
+
+    from PIL import Image
+
+    widths = rendered_widths(args.column)
+    plan: list[tuple[str, int, int, list[int], str]] = []  # (asset, CSS px, natural px, widths, cache base)
+    animated: set[str] = set()                          # copied as they are, never encoded
+    for path, css_px in sorted(widths.items()):
+        src = os.path.join(ptx_lint.ASSETS, path)
+        with Image.open(src) as im:                     # reads the header only
+            natural = im.width
+            if getattr(im, "is_animated", False):
+                animated.add(path)
+        px = ladder(math.ceil(css_px * args.dpr), natural, steps)
+        plan.append((path, css_px, natural, px, os.path.join(CACHE_DIR, f"{file_sha1(src)[:16]}-q{args.quality}"
+                                                              f"-v{SETTINGS_VERSION}")))
+    if args.dry_run:
+        for path, css_px, _natural, px, _base in plan:
+            print(f"{css_px:5} css px -> {', '.join(map(str, px)):>16}  {path}")
+        print(f"{len(plan)} image(s)")
+        return 0
+
+    fmts = modern_formats()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    todo: list[tuple[str, tuple[int, ...], int, tuple[str, ...], str]] = []
+    for path, _css_px, _natural, px, base in plan:
+        ext = os.path.splitext(path)[1].lower()
+        if path not in animated and not all(os.path.exists(f"{base}-{w}w{e}") for w in px for e in (ext, *(f".{f}" for f in fmts))):
+            todo.append((os.path.join(ptx_lint.ASSETS, path), tuple(px), args.quality, fmts, base))
+    jobs = min(args.jobs or os.cpu_count() or 1, len(todo))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(encode, todo, chunksize=4))
+    else:
+        for job in todo:
+            encode(job)
+
+    before = after = 0
+    responsive: dict[str, tuple[list[int], int, tuple[str, ...]]] = {}
+    ext_dir = os.path.join(outdir, "external")
+    for path, css_px, natural, px, base in plan:
+        src = os.path.join(ptx_lint.ASSETS, path)
+        ext = os.path.splitext(path)[1].lower()
+        dest = os.path.join(ext_dir, path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        top = f"{base}-{px[-1]}w{ext}"
+        if path in animated or not os.path.exists(top):    # left as it is
+            shutil.copyfile(src, dest)
+            before += os.path.getsize(src)
+            after += os.path.getsize(dest)
+            continue
+        if px[-1] == natural and os.path.getsize(top) >= os.path.getsize(src):
+            top = src                               # not resized and already as small as it gets
+        shutil.copyfile(top, dest)
+        before += os.path.getsize(src)
+        after += os.path.getsize(dest)
+        for w in px:
+            if w != px[-1]:
+                shutil.copyfile(f"{base}-{w}w{ext}", os.path.join(ext_dir, variant_path(path, None, w)))
+            for fmt in fmts:
+                shutil.copyfile(f"{base}-{w}w.{fmt}",
+                                os.path.join(ext_dir, variant_path(path, fmt, None if w == px[-1] else w)))
+        responsive[path] = (px, css_px, fmts)
+    print(f"{len(plan)} image(s): encoded {len(todo)}, {len(plan) - len(todo) - len(animated)} from cache, "
+          f"{len(animated)} animated; "
+          f"{before / 1e6:.1f} MB -> {after / 1e6:.1f} MB at full width"
+          + (f" (+ {', '.join(fmts)} variants)" if fmts else ""))
+    if not args.no_html:
+        pages, imgs = rewrite_html(outdir, responsive, args.column)
+        print(f"srcset added to {imgs} <img> on {pages} page(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+"""page_weight.py — what does a student actually download for each built page?
+
+Walks output/<target>/ (the same directory screenshot_build.py serves) after a
+build and, for every page, adds up the HTML plus everything it pulls in: images,
+stylesheets (and the fonts/backgrounds their url()s reference), scripts, and
+local iframes. Off-site requests (MathJax CDN, rossmanchance.com applets, ...)
+are counted but cannot be sized, so they are listed per host. Shared assets are
+counted for every page that uses them — the numbers are a cold first visit.
+Responsive images count once, as the one file the browser would pick: the first
+<source> of a <picture>, and from a srcset the candidate `sizes` selects in a
+1280 px window on a 2x screen (VIEWPORT_PX, DPR).
+
+Usage (from repo root):
+    pretext build runestone
+    python scripts/page_weight.py                         # top pages by weight + largest assets
+    python scripts/page_weight.py --pages "inv-5-*.html" --top 50
+    python scripts/page_weight.py --compressed            # text assets at their gzip size
+    python scripts/page_weight.py --budget page-budget.json --json "$SCRATCH/weight.json"
+
+A budget file sets limits per page; any page over budget is reported and the exit
+code is 1, so the check can gate CI. Keys of "pages" are glob patterns, the first
+match (in file order) overrides "default"; a limit may be omitted or null:
+
+    {"default": {"bytes": 3000000, "image_bytes": 2000000, "requests": 100},
+     "pages": {"inv-*.html": {"bytes": 4000000}}}
+"""
+from __future__ import annotations
+import argparse
+import fnmatch
+import functools
+import gzip
+import json
+import os
+import re
+import sys
+from collections import Counter, defaultdict, deque
+from html.parser import HTMLParser
+from urllib.parse import unquote, urlsplit
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(REPO, "page-budget.json")
+LIMITS = ("bytes", "image_bytes", "requests")
+
+KINDS = {
+    ".png": "image", ".jpg": "image", ".jpeg": "image", ".gif": "image", ".svg": "image",
+    ".webp": "image", ".avif": "image", ".ico": "image",
+    ".css": "css", ".js": "js", ".mjs": "js",
+    ".woff": "font", ".woff2": "font", ".ttf": "font", ".otf": "font", ".eot": "font",
+    ".html": "html", ".htm": "html",
+}
+TEXT_KINDS = {"html", "css", "js"}
+RE_CSS_URL = re.compile(r"""url\(\s*['"]?([^'")]+?)['"]?\s*\)|@import\s+['"]([^'"]+)['"]""", re.I)
+
+# reference screen for picking srcset candidates: a laptop window, 2x pixels
+VIEWPORT_PX = 1280
+DPR = 2
+RE_SIZES_MEDIA = re.compile(r"^\(\s*(max|min)-width\s*:\s*(\d+(?:\.\d+)?)px\s*\)\s*(.*)$", re.I)
+RE_LENGTH = re.compile(r"^(\d+(?:\.\d+)?)(px|vw)$", re.I)
+
+# (tag, attribute) pairs that make the browser fetch something (<img> and
+# <source> are handled separately: one candidate per image)
+FETCHING = {
+    ("script", "src"), ("iframe", "src"),
+    ("video", "src"), ("video", "poster"), ("audio", "src"), ("embed", "src"),
+    ("object", "data"), ("input", "src"),
+}
+LINK_RELS = {"stylesheet", "icon", "shortcut icon", "preload", "modulepreload", "apple-touch-icon"}
+
+
+def slot_width(sizes: str | None) -> float:
+    """CSS px the `sizes` attribute gives the image at VIEWPORT_PX (100vw if absent)."""
+    for entry in (sizes or "").split(","):
+        entry = entry.strip()
+        m = RE_SIZES_MEDIA.match(entry)
+        if m:
+            limit = float(m.group(2))
+            if (VIEWPORT_PX > limit) if m.group(1).lower() == "max" else (VIEWPORT_PX < limit):
+                continue
+            entry = m.group(3).strip()
+        length = RE_LENGTH.match(entry)
+        if length:
+            value = float(length.group(1))
+            return value if length.group(2).lower() == "px" else VIEWPORT_PX * value / 100
+        if entry:
+            break       # calc() etc.: fall back to the full width
+    return VIEWPORT_PX
+
+
+def pick_candidate(srcset: str, sizes: str | None) -> str | None:
+    """The srcset URL a browser picks on the reference screen: the smallest one that
+    covers the slot at DPR (by w or x descriptor), else the largest."""
+    need = slot_width(sizes) * DPR
+    candidates: list[tuple[float, str]] = []
+    for item in srcset.split(","):
+        parts = item.split()
+        if not parts:
+            continue
+        desc = parts[1].lower() if len(parts) > 1 else "1x"
+        try:
+            density = float(desc[:-1]) * (DPR / need if desc.endswith("w") else 1)
+        except ValueError:
+            continue
+        candidates.append((density, parts[0]))
+    if not candidates:
+        return None
+    covering = [c for c in candidates if c[0] >= DPR]
+    return (min(covering) if covering else max(candidates))[1]
+
+
+class RefParser(HTMLParser):
+    """Collects the URLs a page fetches on load (in document order)."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.refs: list[str] = []
+        self.picture_depth = 0      # inside <picture>: the browser loads one of its candidates
+        self.picked = False         # ... and the current <picture> already has it
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        a = {k: v for k, v in attrs if v is not None}
+        if tag == "link":
+            if a.get("rel", "").lower() in LINK_RELS and "href" in a:
+                self.refs.append(a["href"])
+            return
+        if tag == "picture":
+            self.picture_depth += 1
+            self.picked = False
+            return
+        if tag == "img" or (tag == "source" and self.picture_depth):
+            self._image(a)
+            return
+        if tag == "source" and "src" in a:       # <video>/<audio> source
+            self.refs.append(a["src"])
+            return
+        for name, value in a.items():
+            if (tag, name) in FETCHING:
+                self.refs.append(value)
+
+    handle_startendtag = handle_starttag
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "picture" and self.picture_depth:
+            self.picture_depth -= 1
+            self.picked = False
+
+    def _image(self, a: dict) -> None:
+        """One fetch per image: the first <source> of a <picture> (the browser takes the
+        first type it supports, and these are modern ones), else the <img>; from a
+        srcset, the candidate sizes selects on the reference screen."""
+        if self.picture_depth and self.picked:
+            return
+        url = pick_candidate(a["srcset"], a.get("sizes")) if a.get("srcset") else None
+        url = url or a.get("src")
+        if url:
+            self.refs.append(url)
+            self.picked = bool(self.picture_depth)
+
+
+def kind_of(path: str) -> str:
+    return KINDS.get(os.path.splitext(path)[1].lower(), "other")
+
+
+def resolve(ref: str, base_dir: str, root: str) -> tuple[str, str]:
+    """("local", abs path) / ("external", host) / ("inline", "") for a referenced URL."""
+    ref = ref.strip()
+    if not ref or ref.startswith(("data:", "#", "javascript:", "about:", "mailto:")):
+        return "inline", ""
+    parts = urlsplit(ref)
+    if parts.scheme or ref.startswith("//"):
+        return "external", parts.netloc or "?"
+    path = unquote(parts.path)
+    if not path:
+        return "inline", ""
+    full = os.path.join(root, path.lstrip("/")) if path.startswith("/") else os.path.join(base_dir, path)
+    return "local", os.path.normpath(full)
+
+
+class Sizer:
+    """On-disk (or gzip) sizes and stylesheet sub-resources, each computed once per run."""
+
+    def __init__(self, root: str, compressed: bool) -> None:
+        self.root = root
+        self.compressed = compressed
+
+    @functools.lru_cache(maxsize=None)
+    def size(self, path: str) -> int | None:
+        try:
+            if self.compressed and kind_of(path) in TEXT_KINDS:
+                with open(path, "rb") as f:
+                    return len(gzip.compress(f.read(), compresslevel=6))
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    @functools.lru_cache(maxsize=None)
+    def css_refs(self, path: str) -> tuple[tuple[str, str], ...]:
+        """Resources a stylesheet pulls in directly (url() and @import)."""
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            return ()
+        found: list[tuple[str, str]] = []
+        for m in RE_CSS_URL.finditer(text):
+            where, target = resolve(m.group(1) or m.group(2), os.path.dirname(path), self.root)
+            if where == "inline":
+                continue
+            found.append((where, target))
+        return tuple(found)
+
+
+def weigh(page: str, sizer: Sizer) -> dict:
+    """Weight record for one page (path relative to the output root)."""
+    path = os.path.join(sizer.root, page)
+    parser = RefParser()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        parser.feed(f.read())
+    parser.close()
+
+    local: dict[str, str] = {}          # path -> kind; each URL is fetched once per page
+    external: Counter = Counter()
+    pending = deque(resolve(r, os.path.dirname(path), sizer.root) for r in parser.refs)
+    while pending:
+        where, target = pending.popleft()
+        if where == "external":
+            external[target] += 1
+        elif where == "local" and target not in local:
+            local[target] = kind_of(target)
+            if local[target] == "css":             # @imports are followed from here
+                pending.extend(sizer.css_refs(target))
+
+    by_kind: Counter = Counter(html=sizer.size(path) or 0)
+    missing: list[str] = []
+    assets: list[tuple[int, str]] = []
+    for asset, kind in local.items():
+        n = sizer.size(asset)
+        if n is None:
+            missing.append(os.path.relpath(asset, sizer.root))
+            continue
+        by_kind[kind] += n
+        assets.append((n, os.path.relpath(asset, sizer.root)))
+    assets.sort(reverse=True)
+    return {
+        "page": page,
+        "bytes": sum(by_kind.values()),
+        "image_bytes": by_kind["image"],
+        "requests": 1 + len(local) + sum(external.values()),
+        "by_kind": dict(by_kind),
+        "external": dict(external),
+        "missing": missing,
+        "largest": [{"path": p, "bytes": n} for n, p in assets[:5]],
+        "assets": [p for _n, p in assets],
+    }
+
+
+def load_budget(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        budget = json.load(f)
+    budget.setdefault("default", {})
+    budget.setdefault("pages", {})
+    return budget
+
+
+def over_budget(record: dict, budget: dict) -> list[str]:
+    """Human-readable violations of the limits that apply to `record["page"]`."""
+    limits = dict(budget["default"])
+    for pattern, override in budget["pages"].items():
+        if fnmatch.fnmatch(record["page"], pattern):
+            limits.update(override)
+            break
+    return [f"{key} {record[key]:,} > {limits[key]:,}"
+            for key in LIMITS if limits.get(key) is not None and record[key] > limits[key]]
+
+
+def human(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024 or unit == "MB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return str(n)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Per-page download weight of a built PreTeXt site.")
+    ap.add_argument("--target", default="runestone", help="output/<target> dir (default: runestone)")
+    ap.add_argument("--pages", default="*.html", metavar="GLOB", help='pages to weigh (default "*.html")')
+    ap.add_argument("--top", type=int, default=20, help="rows in the page and asset tables (default 20)")
+    ap.add_argument("--compressed", action="store_true",
+                    help="count HTML/CSS/JS at their gzip size (as preview_server/Runestone send them)")
+    ap.add_argument("--budget", metavar="FILE",
+                    help="JSON budget; exit 1 if any page exceeds it (default: page-budget.json if present)")
+    ap.add_argument("--json", metavar="FILE", help="also write every page record as JSON ('-' = stdout)")
+    args = ap.parse_args()
+
+    outdir = os.path.join(REPO, "output", args.target)
+    if not os.path.isdir(outdir):
+        print(f"ERROR: output/{args.target}/ does not exist — run `pretext build {args.target}` first.")
+        return 2
+    pages = sorted(f for f in os.listdir(outdir)
+                   if fnmatch.fnmatch(f, args.pages) and os.path.isfile(os.path.join(outdir, f)))
+    if not pages:
+        print(f"ERROR: no pages matching {args.pages!r} in output/{args.target}/")
+        return 2
+
+    sizer = Sizer(outdir, args.compressed)
+    records = [weigh(p, sizer) for p in pages]
+    out = sys.stderr if args.json == "-" else sys.stdout   # keep stdout pure JSON
+    say = functools.partial(print, file=out)
+
+    say(f"{len(records)} page(s) in output/{args.target}/"
+        + (" (HTML/CSS/JS at gzip size)" if args.compressed else ""))
+    say(f"{'page':40} {'total':>10} {'images':>10} {'css+js':>10} {'reqs':>5} {'off-site':>8}")
+    for r in sorted(records, key=lambda r: -r["bytes"])[:args.top]:
+        k = r["by_kind"]
+        say(f"{r['page']:40} {human(r['bytes']):>10} {human(r['image_bytes']):>10} "
+            f"{human(k.get('css', 0) + k.get('js', 0)):>10} {r['requests']:>5} {sum(r['external'].values()):>8}")
+
+    used_by: Counter = Counter(a for r in records for a in r["assets"])
+    say("\nlargest assets (bytes, pages using it):")
+    for asset in sorted(used_by, key=lambda a: -(sizer.size(os.path.join(outdir, a)) or 0))[:args.top]:
+        say(f"  {human(sizer.size(os.path.join(outdir, asset)) or 0):>10}  {used_by[asset]:>4}  {asset}")
+
+    hosts: dict[str, int] = defaultdict(int)
+    for r in records:
+        for host, n in r["external"].items():
+            hosts[host] += n
+    if hosts:
+        say("\noff-site requests (not sized):")
+        for host, n in sorted(hosts.items(), key=lambda kv: -kv[1]):
+            say(f"  {n:>6}  {host}")
+    missing = sorted({m for r in records for m in r["missing"]})
+    if missing:
+        say(f"\n{len(missing)} referenced file(s) missing from the build, e.g. {', '.join(missing[:5])}")
+
+    if args.json:
+        data = json.dumps({"target": args.target, "compressed": args.compressed, "pages": records}, indent=1)
+        if args.json == "-":
+            sys.stdout.write(data + "\n")
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                f.write(data + "\n")
+
+    budget_path = args.budget or (DEFAULT_BUDGET if os.path.exists(DEFAULT_BUDGET) else None)
+    if not budget_path:
+        return 0
+    budget = load_budget(budget_path)
+    failures = [(r["page"], v) for r in records if (v := over_budget(r, budget))]
+    say(f"\nbudget {args.budget or os.path.basename(DEFAULT_BUDGET)}: "
+        + (f"{len(failures)} page(s) over" if failures else "all pages within budget"))
+    for page, violations in failures:
+        say(f"  OVER  {page}: {'; '.join(violations)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,15 +8,35 @@ be Read/viewed directly — including equations, images, and table layouts that
 plain text extraction loses.
 
 Usage (from repo root; write PNGs to the scratchpad, not the repo):
-    # find the page numbers first, e.g.:
-    uv run --with pypdf python -c "import pypdf; r=pypdf.PdfReader('source/iscam4_RJMPWin26.pdf'); \
-        [print(i+1) for i,p in enumerate(r.pages) if 'Investigation 5.7:' in (p.extract_text() or '')]"
-    # then render that range:
+    # render the pages of one investigation, located via the PDF's text layer:
+    uv run --with pymupdf python scripts/pdf_pages.py source/iscam4_RJMPWin26.pdf --find "Investigation 5.7" "$SCRATCH/inv57"
+    # or an explicit range:
     uv run --with pymupdf python scripts/pdf_pages.py source/iscam4_RJMPWin26.pdf 352-359 "$SCRATCH/inv57"
 
 Produces $SCRATCH/inv57-p352.png, -p353.png, ... Then Read each PNG.
+
+--find uses the page-text index that scripts/gold_index.py builds once per PDF
+revision (in .gold-index/): "Investigation 5.7" / "Practice Problem 5.10A"
+resolve to that section's page range; any other text renders every page whose
+text layer contains it. Add --dry-run to just print the pages.
+
+Pages are rendered in parallel (one process per CPU by default, each with its own
+PyMuPDF document; --jobs 1 for serial) and cached in .pdf-cache/ keyed by the
+PDF's content hash, page and dpi, so re-rendering a range you already looked at
+just copies the cached PNGs (--no-cache to force a fresh render).
 """
-import sys
+from __future__ import annotations
+import argparse
+import hashlib
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO, ".pdf-cache")
+
+_doc = None   # per-worker PyMuPDF document (see _open)
 
 
 def parse_range(spec: str) -> range:
@@ -27,26 +47,120 @@ def parse_range(spec: str) -> range:
     return range(n, n + 1)
 
 
-def main() -> int:
-    if len(sys.argv) not in (4, 5):
-        print("usage: pdf_pages.py <pdf> <start-end|page> <out-prefix> [dpi]", file=sys.stderr)
-        return 2
-    pdf_path, spec, prefix = sys.argv[1], sys.argv[2], sys.argv[3]
-    dpi = int(sys.argv[4]) if len(sys.argv) == 5 else 150
+def pdf_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
 
+def _open(pdf_path: str) -> None:
+    """Process-pool initializer: each worker opens its own copy of the PDF."""
+    global _doc
     import fitz  # PyMuPDF
 
-    doc = fitz.open(pdf_path)
+    _doc = fitz.open(pdf_path)
+
+
+def render(job: tuple[int, int, str]) -> str:
+    """Render 1-indexed page `pno` at `dpi` to `out` (atomically); returns `out`."""
+    import fitz  # PyMuPDF
+
+    pno, dpi, out = job
     zoom = dpi / 72.0
-    mat = fitz.Matrix(zoom, zoom)
-    for pno in parse_range(spec):  # 1-indexed page numbers
-        if pno < 1 or pno > doc.page_count:
-            print(f"skip page {pno} (out of range 1..{doc.page_count})")
+    tmp = f"{out}.{os.getpid()}.tmp"
+    _doc.load_page(pno - 1).get_pixmap(matrix=fitz.Matrix(zoom, zoom)).save(tmp, output="png")
+    os.replace(tmp, out)
+    return out
+
+
+def find_pages(pdf: str, query: str) -> list[int]:
+    """Pages for `query`: a section's page range, or every page containing the text."""
+    import gold_index
+
+    index, text_path = gold_index.load(pdf)
+    m = re.fullmatch(r"\s*(Investigation|Practice Problem)\s+([A-Z0-9]+\.\d+[A-Z]?)\s*:?\s*", query, re.I)
+    if m:
+        kind = "investigation" if m.group(1).lower() == "investigation" else "practice"
+        entry = index["entries"].get(f"{kind}:{m.group(2)}")
+        if entry is not None:
+            return list(range(entry["pages"][0], entry["pages"][1] + 1))
+    with open(text_path, encoding="utf-8") as f:
+        pages = f.read().split("\f")
+    needle = query.lower()
+    return [i + 1 for i, text in enumerate(pages) if needle in text.lower()]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Render PDF pages to PNGs (parallel, cached).",
+        usage="%(prog)s pdf (pages | --find TEXT) prefix [dpi] [options]")
+    ap.add_argument("pdf")
+    ap.add_argument("args", nargs="*", metavar="pages prefix [dpi]",
+                    help="page or start-end range, 1-indexed (e.g. 352-359; omit with --find), "
+                         "output prefix (writes <prefix>-p<N>.png), dpi (default 150)")
+    ap.add_argument("--find", metavar="TEXT",
+                    help='locate the pages via the text layer, e.g. "Investigation 5.7"')
+    ap.add_argument("--dry-run", action="store_true", help="print the pages that would be rendered and stop")
+    ap.add_argument("--jobs", "-j", type=int, default=0, metavar="N",
+                    help="render in N processes (default 0 = one per CPU)")
+    ap.add_argument("--no-cache", action="store_true", help="ignore and do not fill .pdf-cache/")
+    args = ap.parse_intermixed_args()   # positionals may follow --find/--dry-run
+    rest = list(args.args)
+    if args.find is None:
+        if len(rest) < 2:
+            ap.error("need a page range and an output prefix (or --find TEXT)")
+        pages = list(parse_range(rest.pop(0)))
+    else:
+        pages = find_pages(args.pdf, args.find)
+        if not pages:
+            print(f"no page of {args.pdf} contains {args.find!r}")
+            return 1
+        print(f"{args.find!r} -> pages {pages[0]}-{pages[-1]}" if pages == list(range(pages[0], pages[-1] + 1))
+              else f"{args.find!r} -> pages {', '.join(map(str, pages))}")
+    if args.dry_run:
+        if args.find is None:
+            print(f"pages {', '.join(map(str, pages))}")
+        return 0
+    if len(rest) not in (1, 2):
+        ap.error("expected: prefix [dpi]")
+    prefix = rest[0]
+    dpi = int(rest[1]) if len(rest) == 2 else 150
+
+    import fitz  # PyMuPDF
+
+    with fitz.open(args.pdf) as doc:
+        page_count = doc.page_count
+    cache = None if args.no_cache else os.path.join(CACHE_DIR, pdf_sha1(args.pdf)[:16])
+    if cache:
+        os.makedirs(cache, exist_ok=True)
+
+    todo: list[tuple[int, int, str]] = []
+    outputs: list[tuple[int, str, str | None]] = []   # (page, out, cached copy)
+    for pno in pages:  # 1-indexed page numbers
+        if pno < 1 or pno > page_count:
+            print(f"skip page {pno} (out of range 1..{page_count})")
             continue
-        page = doc.load_page(pno - 1)
         out = f"{prefix}-p{pno}.png"
-        page.get_pixmap(matrix=mat).save(out)
-        print(f"wrote {out}")
+        cached = os.path.join(cache, f"p{pno}-{dpi}dpi.png") if cache else None
+        if cached is None or not os.path.exists(cached):
+            todo.append((pno, dpi, cached or out))
+        outputs.append((pno, out, cached))
+    jobs = min(args.jobs or os.cpu_count() or 1, len(todo))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_open, initargs=(args.pdf,)) as pool:
+            list(pool.map(render, todo))
+    elif todo:
+        _open(args.pdf)
+        for job in todo:
+            render(job)
+
+    rendered = {job[0] for job in todo}
+    for pno, out, cached in outputs:
+        if cached:
+            shutil.copyfile(cached, out)
+        print(f"wrote {out}" + ("" if pno in rendered else " (cached)"))
     return 0
 
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""preview_server.py — serve a local build the way a real web server would.
+
+`python -m http.server` (and the single-threaded TCPServer screenshot_build.py
+used to start) answers one request at a time, never compresses and never
+revalidates, so a page that pulls dozens of images and MathJax fonts loads
+artificially serially. This server instead:
+
+  * handles requests concurrently (one thread per connection, HTTP/1.1 keep-alive)
+  * gzip-compresses HTML/CSS/JS/JSON/SVG (brotli too, if the `brotli` package is
+    installed and the browser asks for it); compressed bodies are cached in memory
+  * sends ETag + Cache-Control: no-cache and answers If-None-Match with 304, so
+    reloads revalidate instead of re-downloading yet edits still show up at once;
+    content-hashed names (fingerprint_css.py) are marked immutable instead
+  * can add a per-request delay (--latency, --jitter) to approximate Runestone
+
+screenshot_build.py (and so visual_diff.py) serve through it. Standalone, from
+repo root, after `pretext build runestone`:
+
+    python scripts/preview_server.py                    # http://127.0.0.1:8000/
+    python scripts/preview_server.py --latency 80 --jitter 40 --port 8080 --target html
+"""
+from __future__ import annotations
+import argparse
+import email.utils
+import functools
+import gzip
+import http.server
+import os
+import random
+import re
+import threading
+import time
+
+try:
+    import brotli  # optional
+except ImportError:
+    brotli = None
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RE_FINGERPRINTED = re.compile(r"\.[0-9a-f]{10}\.[a-z0-9]+$")   # fingerprint_css.py names
+COMPRESSIBLE = {".html", ".htm", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map"}
+
+
+@functools.lru_cache(maxsize=512)
+def _compressed(path: str, mtime_ns: int, size: int, encoding: str) -> bytes:
+    """Compressed body of `path`; (mtime, size) are part of the key so edits invalidate it."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+class PreviewHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0       # seconds added to every request
+    jitter = 0.0        # + uniform random 0..jitter seconds
+    quiet = True
+
+    def do_GET(self) -> None:
+        self._delay()
+        self._send(head_only=False)
+
+    def do_HEAD(self) -> None:
+        self._delay()
+        self._send(head_only=True)
+
+    def _delay(self) -> None:
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def _encoding(self, ext: str) -> str | None:
+        if ext not in COMPRESSIBLE:
+            return None
+        offered = {}
+        for part in self.headers.get("Accept-Encoding", "").split(","):
+            name, _, params = part.strip().partition(";")
+            q = params.strip()[2:] if params.strip().startswith("q=") else "1"
+            try:
+                offered[name.strip().lower()] = float(q)
+            except ValueError:
+                continue
+        if brotli is not None and offered.get("br", 0) > 0:
+            return "br"
+        if offered.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+
+    def _send(self, head_only: bool) -> None:
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            # directories (index.html / listings), redirects and 404s: stock behaviour
+            f = self.send_head()
+            if f:
+                try:
+                    if not head_only:
+                        self.copyfile(f, self.wfile)
+                finally:
+                    f.close()
+            return
+        st = os.stat(path)
+        enc = self._encoding(os.path.splitext(path)[1].lower())
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-" + enc if enc else ""}"'
+        cache = "public, max-age=31536000, immutable" if RE_FINGERPRINTED.search(path) else "no-cache"
+        if etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cache)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = _compressed(path, st.st_mtime_ns, st.st_size, enc) if enc else None
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(len(body) if body is not None else st.st_size))
+        self.send_header("Last-Modified", email.utils.formatdate(st.st_mtime, usegmt=True))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache)
+        self.send_header("Vary", "Accept-Encoding")
+        if enc:
+            self.send_header("Content-Encoding", enc)
+        self.end_headers()
+        if head_only:
+            return
+        if body is not None:
+            self.wfile.write(body)
+        else:
+            with open(path, "rb") as f:
+                self.copyfile(f, self.wfile)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def serve(directory: str, port: int = 0, latency_ms: float = 0, jitter_ms: float = 0,
+          quiet: bool = True, host: str = "127.0.0.1") -> tuple[http.server.ThreadingHTTPServer, int]:
+    """Start serving `directory` on a background thread; returns (server, port).
+
+    port 0 picks a free port. Call server.shutdown() when done.
+    """
+    handler = type("Handler", (PreviewHandler,), {
+        "latency": latency_ms / 1000, "jitter": jitter_ms / 1000, "quiet": quiet,
+    })
+    httpd = http.server.ThreadingHTTPServer((host, port), functools.partial(handler, directory=directory))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, httpd.server_address[1]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Threaded, compressing preview server for output/<target>/.")
+    ap.add_argument("--target", default="runestone", help="output/<target> dir (default: runestone)")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--latency", type=float, default=0, metavar="MS", help="delay added to every request")
+    ap.add_argument("--jitter", type=float, default=0, metavar="MS", help="plus a random 0..MS delay")
+    args = ap.parse_args()
+
+    outdir = os.path.join(REPO, "output", args.target)
+    if not os.path.isdir(outdir):
+        print(f"ERROR: output/{args.target}/ does not exist — run `pretext build {args.target}` first.")
+        return 2
+    httpd, port = serve(outdir, args.port, args.latency, args.jitter, quiet=False)
+    print(f"serving output/{args.target}/ at http://127.0.0.1:{port}/ "
+          f"(gzip{'+br' if brotli else ''}, latency {args.latency:g}+{args.jitter:g} ms) — Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        httpd.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""ptx_includes.py — the xi:include graph of the ISCAM book, for linters and tools.
+
+Builds the include graph rooted at source/main.ptx once (each file parsed once,
+set-based visited tracking) and exposes it so tools can ask structural questions:
+
+    children / parents     direct xi:include edges, in document order
+    order                  every reachable file once, in document (pre)order
+    depth                  nesting level where a file first appears (main.ptx = 0)
+    missing                includes that point at files not on disk
+    cycles                 include cycles (each as the path that closes the loop)
+    ancestors(path)        every file whose output contains `path`, i.e. which
+                           files a change to `path` affects
+
+ptx_lint.py uses this for include resolution. Standalone (from repo root):
+
+    python scripts/ptx_includes.py --tree                             # indented include tree
+    python scripts/ptx_includes.py --affected source/ch5/inv-5-6.ptx  # who includes it (transitively)
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+from collections import deque
+from typing import Callable, Iterable
+
+# path -> [(href, line)] for each file in the batch, or None if the file is unreadable
+Loader = Callable[[list[str]], dict[str, "list[tuple[str, int]] | None"]]
+
+
+class IncludeGraph:
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.children: dict[str, list[str]] = {}
+        self.parents: dict[str, list[str]] = {}
+        self.order: list[str] = []
+        self.depth: dict[str, int] = {}
+        self.missing: list[tuple[str, int, str]] = []   # (includer, line, target)
+        self.cycles: list[list[str]] = []
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.depth
+
+    def ancestors(self, path: str) -> list[str]:
+        """Files that (transitively) include `path`, nearest first."""
+        return self._walk(path, self.parents)
+
+    def descendants(self, path: str) -> list[str]:
+        """Files that `path` (transitively) includes, nearest first."""
+        return self._walk(path, self.children)
+
+    def affected_by(self, paths: Iterable[str]) -> set[str]:
+        """The changed `paths` plus every file whose output includes one of them."""
+        out: set[str] = set()
+        for p in paths:
+            p = os.path.normpath(p)
+            out.add(p)
+            out.update(self.ancestors(p))
+        return out
+
+    @staticmethod
+    def _walk(start: str, edges: dict[str, list[str]]) -> list[str]:
+        seen = {start}
+        out: list[str] = []
+        queue = deque(edges.get(start, ()))
+        while queue:
+            cur = queue.popleft()
+            if cur in seen:
+                continue
+            seen.add(cur)
+            out.append(cur)
+            queue.extend(edges.get(cur, ()))
+        return out
+
+
+def build(root: str, load: Loader) -> IncludeGraph:
+    """Discover every file reachable from `root` and return its IncludeGraph.
+
+    `load` is called with batches of not-yet-seen files (one batch per BFS level)
+    and must return each file's (href, line) include list, so callers control how
+    files are read — cached, in parallel, etc. Hrefs resolve relative to the file.
+    """
+    root = os.path.normpath(root)
+    g = IncludeGraph(root)
+    seen = {root}
+    frontier = [root]
+    while frontier:
+        loaded = load(frontier)
+        nxt: list[str] = []
+        for cur in frontier:
+            kids: list[str] = []
+            base = os.path.dirname(cur)
+            for href, line in loaded.get(cur) or ():
+                target = os.path.normpath(os.path.join(base, href))
+                if not os.path.exists(target):
+                    g.missing.append((cur, line, target))
+                    continue
+                kids.append(target)
+                g.parents.setdefault(target, []).append(cur)
+                if target not in seen:
+                    seen.add(target)
+                    nxt.append(target)
+            g.children[cur] = kids
+        frontier = nxt
+    _order(g)
+    return g
+
+
+def _order(g: IncludeGraph) -> None:
+    """Fill g.order/g.depth by iterative DFS in document order; record cycles."""
+    on_path: dict[str, int] = {}      # file -> index in `path` (the current include chain)
+    path: list[str] = []
+    stack: list[tuple[str, int]] = [(g.root, 0)]
+    while stack:
+        cur, i = stack.pop()
+        if i == 0:
+            g.depth[cur] = len(path)
+            g.order.append(cur)
+            on_path[cur] = len(path)
+            path.append(cur)
+        kids = g.children.get(cur, [])
+        if i < len(kids):
+            stack.append((cur, i + 1))
+            kid = kids[i]
+            if kid in on_path:
+                g.cycles.append(path[on_path[kid]:] + [kid])
+            elif kid not in g.depth:
+                stack.append((kid, 0))
+        else:
+            path.pop()
+            del on_path[cur]
+
+
+def main() -> int:
+    from ptx_lint import CACHE_FILE, MAIN, FactCache, rel
+
+    ap = argparse.ArgumentParser(description="Inspect the xi:include graph rooted at source/main.ptx.")
+    ap.add_argument("--tree", action="store_true", help="print the include tree")
+    ap.add_argument("--affected", nargs="+", metavar="FILE",
+                    help="print the files whose output includes any of FILE (transitively)")
+    args = ap.parse_args()
+
+    cache = FactCache(CACHE_FILE)
+
+    def load(paths: list[str]) -> dict:
+        out = {}
+        for p in paths:
+            facts = cache.get(p)
+            out[p] = facts.includes if facts is not None else None
+        return out
+
+    g = build(MAIN, load)
+    cache.save()
+    if args.affected:
+        for p in sorted(g.affected_by(os.path.abspath(a) for a in args.affected), key=rel):
+            print(rel(p))
+    if args.tree or not args.affected:
+        for p in g.order:
+            print("  " * g.depth[p] + rel(p))
+    for cyc in g.cycles:
+        print("include cycle: " + " -> ".join(rel(p) for p in cyc), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
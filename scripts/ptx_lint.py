@@ -10,6 +10,7 @@ be caught BEFORE committing/pushing to Runestone:
     * dangling <xref ref="...">       -> the fatal "does not point to any target" build error
     * duplicate xml:id                -> ambiguous xref targets
     * xi:include of a missing file
+    * xi:include cycles
     * <image source> file missing
     * <image source> case mismatch    -> works on Windows/Mac, BREAKS on Runestone's Linux
     * <p> directly wrapping a block list (<ul>/<ol>) -> deprecated block-in-inline
@@ -17,20 +18,45 @@ be caught BEFORE committing/pushing to Runestone:
   WARN-level (worth a look, not necessarily wrong):
     * .ptx files under source/ not reachable from main.ptx (orphans/backups)
     * parentheses in an <image source> filename (repo convention forbids them)
+    * (--unused-assets) image files under assets/ that no <image> references
 
-This is intentionally regex/heuristic based (fast, line-numbered) rather than a full
-schema validator. For strict schema validation use `pretext validate` (needs jing +
-Java; see scripts/setup-jing.ps1). Run this from the repo root:
+This is intentionally heuristic (fast, line-numbered) rather than a full schema
+validator: each file is tokenized ONCE into a small table of facts (ids, labels,
+xrefs, images, includes — each with its line number) and every check runs against
+those tables, so cost is linear in the size of the book. Comments and CDATA are
+skipped, so commented-out markup is not linted. For strict schema validation use
+`pretext validate` (needs jing + Java; see scripts/setup-jing.ps1). Run this from
+the repo root:
 
     python scripts/ptx_lint.py            # or: uv run python scripts/ptx_lint.py
+    python scripts/ptx_lint.py --no-cache # ignore/skip the on-disk fact cache
+    python scripts/ptx_lint.py --unused-assets   # also list unreferenced image files
+    python scripts/ptx_lint.py --jobs 0   # tokenize in parallel, one worker per CPU
+    python scripts/ptx_lint.py --watch    # stay resident; re-lint files as they are saved
+    python scripts/ptx_lint.py --timings  # add counts + per-check / slowest-file timings
+    python scripts/ptx_lint.py --format sarif -o lint.sarif   # or --format json (JSON lines)
+
+Per-file facts are cached in .ptxlint-cache/ keyed by mtime+size and content hash,
+so after a one-file edit only that file is re-tokenized; the cross-file checks
+(duplicate ids, dangling xrefs, orphans) are always recomputed from the facts.
 
 Exit code is 1 if any ERROR-level findings, else 0.
 """
 from __future__ import annotations
+import argparse
+import hashlib
+import json
 import os
 import re
 import sys
+import time
 from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, NamedTuple, TextIO
+
+from ptx_includes import IncludeGraph, build as build_include_graph
 
 # Windows consoles default to cp1252 and mangle Unicode in findings; force UTF-8.
 for _stream in (sys.stdout, sys.stderr):
@@ -43,145 +69,694 @@ REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SOURCE = os.path.join(REPO, "source")
 ASSETS = os.path.join(REPO, "assets")
 MAIN = os.path.join(SOURCE, "main.ptx")
+CACHE_DIR = os.path.join(REPO, ".ptxlint-cache")
+CACHE_FILE = os.path.join(CACHE_DIR, "facts.json")
+
+# --- single-pass tokenizer (tags + attributes; good enough for a linter) ---
+# One alternation over the whole file: comments and CDATA are consumed (and ignored)
+# so that markup inside them is never mistaken for real tags.
+RE_TOKEN = re.compile(
+    r'<!--.*?-->'
+    r'|<!\[CDATA\[.*?\]\]>'
+    r'|<(?P<end>/)?(?P<name>[A-Za-z_][\w:.-]*)(?P<attrs>(?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.S,
+)
+RE_ATTR = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+BLOCK_LISTS = ("ul", "ol")
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp")
+
+
+class Finding(NamedTuple):
+    severity: str        # "ERROR" or "WARN"
+    code: str            # e.g. "dangling-xref"; see CHECKS
+    file: str | None     # repo-relative, forward slashes
+    line: int | None
+    message: str         # human text; printed as "[code] message"
+
+    def __str__(self) -> str:
+        return f"[{self.code}] {self.message}"
 
-# --- lightweight regexes (attribute extraction; good enough for a linter) ---
-RE_INCLUDE = re.compile(r'<xi:include\s+href="([^"]+)"')
-RE_XMLID = re.compile(r'\bxml:id="([^"]+)"')
-RE_LABEL = re.compile(r'\blabel="([^"]+)"')
-RE_XREF = re.compile(r'<xref\b[^>]*\bref="([^"]+)"')
-RE_IMAGE = re.compile(r'<image\b[^>]*\bsource="([^"]+)"')
-RE_P_BLOCKLIST = re.compile(r'<p>\s*<(ul|ol)\b|</(ul|ol)>\s*</p>')
 
-errors: list[str] = []
-warns: list[str] = []
+# finding code -> one-line description (SARIF rule metadata)
+CHECKS = {
+    "dotted-label": "@label contains a period (rejected by pretext >= ~2.40 / Runestone)",
+    "dangling-xref": "<xref ref> has no matching xml:id or label",
+    "dup-xml:id": "xml:id defined more than once",
+    "missing-include": "xi:include points at a file that does not exist",
+    "include-cycle": "xi:include chain includes itself",
+    "image-missing": "<image source> not found under assets/",
+    "image-case": "<image source> differs in case from the file on disk (breaks on Linux)",
+    "p-wraps-list": "<p> directly wraps a <ul>/<ol> block",
+    "orphan-file": ".ptx file under source/ not reachable from main.ptx",
+    "image-parens": "<image source> filename contains parentheses",
+    "unused-asset": "image file under assets/ not referenced by any <image>",
+}
+
+
+@dataclass
+class Facts:
+    """Everything the checks need from one .ptx file, as (value, line) pairs."""
+    includes: list[tuple[str, int]] = field(default_factory=list)
+    ids: list[tuple[str, int]] = field(default_factory=list)
+    labels: list[tuple[str, int]] = field(default_factory=list)
+    xrefs: list[tuple[str, int]] = field(default_factory=list)
+    images: list[tuple[str, int]] = field(default_factory=list)
+    image_widths: list[tuple[str, str]] = field(default_factory=list)  # (source, @width or "")
+    p_lists: list[int] = field(default_factory=list)   # lines where <p> wraps <ul>/<ol>
 
 
 def rel(path: str) -> str:
     return os.path.relpath(path, REPO).replace("\\", "/")
 
 
-def lines_of(path: str) -> list[str]:
-    with open(path, encoding="utf-8") as f:
-        return f.readlines()
+def extract(text: str) -> Facts:
+    """Tokenize one file's text in a single pass and collect its Facts."""
+    facts = Facts()
+    line, pos = 1, 0
+    prev = None            # (is_end, name, end_offset) of the previous tag token
+    for m in RE_TOKEN.finditer(text):
+        line += text.count("\n", pos, m.start())
+        pos = m.start()
+        name = m.group("name")
+        if name is None:   # comment / CDATA
+            prev = None
+            continue
+        is_end = bool(m.group("end"))
+        # <p> immediately followed by <ul>/<ol>, or </ul>/</ol> immediately followed by </p>
+        if prev is not None and not text[prev[2]:m.start()].strip():
+            if (not is_end and name in BLOCK_LISTS and prev[:2] == (False, "p")) or \
+               (is_end and name == "p" and prev[0] and prev[1] in BLOCK_LISTS):
+                if not facts.p_lists or facts.p_lists[-1] != line:
+                    facts.p_lists.append(line)
+        prev = (is_end, name, m.end())
+        if is_end:
+            continue
+        attrs = m.group("attrs")
+        if "=" not in attrs:
+            continue
+        source = width = None
+        for a in RE_ATTR.finditer(attrs):
+            key = a.group(1)
+            val = a.group(2) if a.group(2) is not None else a.group(3)
+            at = line + text.count("\n", m.start(), m.start("attrs") + a.start())
+            if key == "xml:id":
+                facts.ids.append((val, at))
+            elif key == "label":
+                facts.labels.append((val, at))
+            elif key == "href" and name == "xi:include":
+                facts.includes.append((val, at))
+            elif key == "ref" and name == "xref":
+                facts.xrefs.append((val, at))
+            elif key == "source" and name == "image":
+                facts.images.append((val, at))
+                source = val
+            elif key == "width" and name == "image":
+                width = val
+        if source is not None:
+            facts.image_widths.append((source, width or ""))
+    return facts
 
 
-def resolve_includes(start: str) -> list[str]:
-    """Return the ordered list of files reachable from `start` via xi:include."""
-    seen: list[str] = []
-    stack = [start]
-    while stack:
-        cur = stack.pop(0)
-        if cur in seen:
-            continue
-        seen.append(cur)
+class FactCache:
+    """Per-file Facts persisted across runs, keyed by (mtime, size) then content hash.
+
+    A file whose mtime+size are unchanged is trusted without being read; otherwise it
+    is read and hashed, and only re-tokenized if the hash differs. Entries are also
+    tagged with a hash of this script, so editing the extractor invalidates them all.
+    """
+
+    def __init__(self, path: str | None) -> None:
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self.dirty = False
+        self.times: dict[str, float] = {}     # path -> seconds spent obtaining its Facts
+        self.hits = self.misses = 0
+        self.signature = _script_signature()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("signature") == self.signature:
+                    self.entries = data.get("files", {})
+            except (OSError, ValueError):
+                pass  # unreadable/corrupt cache -> start fresh
+
+    def get(self, path: str) -> Facts | None:
+        """Facts for `path` (from cache when still valid), or None if unreadable."""
+        return self.get_many([path])[path]
+
+    def get_many(self, paths: list[str], pool: Executor | None = None) -> dict[str, Facts | None]:
+        """Facts for each of `paths`; cache misses are read/tokenized on `pool` if given.
+
+        The result follows the order of `paths` regardless of which worker finishes first.
+        """
+        out: dict[str, Facts | None] = {}
+        todo: list[tuple[str, str | None]] = []     # (path, cached sha1)
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                out[path] = None
+                continue
+            entry = self.entries.get(rel(path))
+            if entry and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                t0 = time.perf_counter()
+                out[path] = facts_from_json(entry["facts"])
+                self.times[path] = time.perf_counter() - t0
+                self.hits += 1
+            else:
+                out[path] = None    # placeholder keeps `paths` order
+                todo.append((path, entry["sha1"] if entry else None))
+        if pool is not None and len(todo) > 1:
+            results = pool.map(scan_file, todo)
+        else:
+            results = map(scan_file, todo)
+        for (path, _sha1), res in zip(todo, results):
+            if res is None:
+                continue
+            mtime, size, digest, facts, elapsed = res
+            self.times[path] = elapsed
+            if facts is None:   # content unchanged, only the mtime moved
+                facts = facts_from_json(self.entries[rel(path)]["facts"])
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.entries[rel(path)] = {"mtime": mtime, "size": size, "sha1": digest,
+                                       "facts": asdict(facts)}
+            self.dirty = True
+            out[path] = facts
+        return out
+
+    def save(self) -> None:
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"signature": self.signature, "files": self.entries}, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def _script_signature() -> str:
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def scan_file(job: tuple[str, str | None]) -> tuple[int, int, str, Facts | None, float] | None:
+    """Stat, hash and (unless the hash equals `job`'s cached sha1) tokenize one file.
+
+    Top-level so it can run in a worker process; returns None if the file is unreadable.
+    """
+    path, known_sha1 = job
+    t0 = time.perf_counter()
+    try:
+        st = os.stat(path)
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    digest = hashlib.sha1(data).hexdigest()
+    facts = None if digest == known_sha1 else extract(data.decode("utf-8"))
+    return st.st_mtime_ns, st.st_size, digest, facts, time.perf_counter() - t0
+
+
+def facts_from_json(d: dict) -> Facts:
+    return Facts(**{k: [tuple(v) if isinstance(v, list) else v for v in vals] for k, vals in d.items()})
+
+
+def resolve_includes(start: str, index: dict[str, Facts], cache: FactCache,
+                     pool: Executor | None = None) -> IncludeGraph:
+    """Build the include graph reachable from `start` via xi:include.
+
+    Each file's Facts are fetched once (from `cache`, re-tokenizing only changed
+    files, one include level at a time on `pool` if given) and stored in `index`.
+    """
+    def load(paths: list[str]) -> dict[str, list[tuple[str, int]] | None]:
+        out: dict[str, list[tuple[str, int]] | None] = {}
+        for path, facts in cache.get_many(paths, pool).items():
+            if facts is not None:
+                index[path] = facts
+            out[path] = facts.includes if facts is not None else None
+        return out
+
+    return build_include_graph(start, load)
+
+
+def ptx_files() -> list[str]:
+    """Every .ptx file under source/, normalized, in sorted order."""
+    out = []
+    for dirpath, _dirs, files in os.walk(SOURCE):
+        out.extend(os.path.normpath(os.path.join(dirpath, fn)) for fn in files if fn.endswith(".ptx"))
+    return sorted(out)
+
+
+def graph_findings(graph: IncludeGraph) -> list[Finding]:
+    out: list[Finding] = []
+    for cur, lineno, target in graph.missing:
+        out.append(Finding("ERROR", "missing-include", rel(cur), lineno,
+                           f"{rel(cur)}:{lineno} includes {rel(target)} "
+                           f"which does not exist"))
+    for cycle in graph.cycles:
+        out.append(Finding("ERROR", "include-cycle", rel(cycle[0]), None,
+                           " -> ".join(rel(p) for p in cycle)))
+    return out
+
+
+def file_findings(path: str, facts: Facts, assets: AssetIndex) -> list[Finding]:
+    """Findings that depend on one file alone (plus assets/ for images)."""
+    where = rel(path)
+    out: list[Finding] = []
+    for val, lineno in facts.labels:
+        if "." in val:
+            out.append(Finding("ERROR", "dotted-label", where, lineno,
+                               f"{where}:{lineno}  label=\"{val}\" — periods are "
+                               f"rejected by pretext>=~2.40 (use hyphens/underscores)"))
+    for source, lineno in facts.images:
+        out.extend(check_image(source, where, lineno, assets))
+    for lineno in facts.p_lists:
+        out.append(Finding("ERROR", "p-wraps-list", where, lineno,
+                           f"{where}:{lineno}  a <p> directly wraps a <ul>/<ol> block "
+                           f"(deprecated; the list should not be inside <p>)"))
+    return out
+
+
+def _keys(facts: Facts) -> set[str]:
+    """Every id/label/xref value a file mentions, i.e. what its edits can affect."""
+    return {v for v, _ in facts.ids} | {v for v, _ in facts.labels} | {v for v, _ in facts.xrefs}
+
+
+class Linter:
+    """Resident lint state: per-file facts, the include graph and id/label/xref tables.
+
+    `scan()` builds everything once. `update(paths)` then re-tokenizes only the given
+    files and re-evaluates only the ids/labels/xrefs they mention (rebuilding the
+    include graph only if their includes changed), which is what --watch relies on.
+    `findings()` assembles the current findings in document order.
+    """
+
+    def __init__(self, cache: FactCache, pool: Executor | None = None,
+                 unused_assets: bool = False) -> None:
+        self.cache = cache
+        self.pool = pool
+        self.unused_assets = unused_assets
+        self.timings: dict[str, float] = defaultdict(float)   # phase/check -> seconds (cumulative)
+        self.file_times: dict[str, float] = {}                # file -> seconds (facts + file checks)
+        with self._timed("asset-index"):
+            self.assets = AssetIndex(ASSETS)
+        self.graph = IncludeGraph(MAIN)
+        self.index: dict[str, Facts] = {}           # reachable file -> facts
+        self.pos: dict[str, int] = {}               # reachable file -> document position
+        self.sources: set[str] = set()              # every .ptx under source/
+        self.local: dict[str, list[Finding]] = {}   # file -> file_findings()
+        # value -> {file: [lines]}
+        self.ids: dict[str, dict[str, list[int]]] = defaultdict(dict)
+        self.labels: dict[str, dict[str, list[int]]] = defaultdict(dict)
+        self.refs: dict[str, dict[str, list[int]]] = defaultdict(dict)
+        self.dups: set[str] = set()
+        self.dangling: set[str] = set()
+
+    @contextmanager
+    def _timed(self, what: str) -> Iterator[None]:
+        t0 = time.perf_counter()
         try:
-            text = open(cur, encoding="utf-8").read()
-        except OSError:
-            continue
-        base = os.path.dirname(cur)
-        # preserve document order for the newly discovered includes
-        found = [os.path.normpath(os.path.join(base, h)) for h in RE_INCLUDE.findall(text)]
-        for i, f in enumerate(found):
-            if not os.path.exists(f):
-                errors.append(f"[missing-include] {rel(cur)} includes {rel(f)} which does not exist")
-        stack = found + stack
-    return seen
+            yield
+        finally:
+            self.timings[what] += time.perf_counter() - t0
+
+    def scan(self) -> None:
+        with self._timed("walk-source"):
+            self.sources = set(ptx_files())
+        touched = self._load_graph()
+        with self._timed("recheck"):
+            self._recheck(touched)
+
+    def update(self, paths: set[str]) -> None:
+        """Re-lint after `paths` were created, modified or deleted."""
+        touched: set[str] = set()
+        regraph = False
+        missing = {target for _cur, _line, target in self.graph.missing}
+        for path in map(os.path.normpath, paths):
+            if path.endswith(".ptx") and path.startswith(SOURCE + os.sep):
+                if os.path.exists(path):
+                    self.sources.add(path)
+                else:
+                    self.sources.discard(path)
+            if path in self.pos:
+                old = self.index[path]
+                new = self.cache.get(path)
+                if new is None or [h for h, _ in new.includes] != [h for h, _ in old.includes]:
+                    regraph = True
+                touched |= self._drop(path)
+                if new is not None:
+                    touched |= self._add(path, new)
+            elif path in missing:
+                regraph = True
+        if regraph:
+            touched |= self._load_graph()
+        with self._timed("recheck"):
+            self._recheck(touched)
+
+    def refresh_assets(self) -> None:
+        """Re-walk assets/ and re-run the image checks (after files there changed)."""
+        with self._timed("asset-index"):
+            self.assets = AssetIndex(ASSETS)
+        with self._timed("file-checks"):
+            for path in self.pos:
+                self.local[path] = file_findings(path, self.index[path], self.assets)
+
+    def _load_graph(self) -> set[str]:
+        """(Re)build the include graph; returns the keys of files that entered/left it."""
+        index: dict[str, Facts] = {}
+        with self._timed("extract+include-graph"):
+            self.graph = resolve_includes(MAIN, index, self.cache, self.pool)
+        old = set(self.pos)
+        self.pos = {p: i for i, p in enumerate(self.graph.order) if p in index}
+        touched: set[str] = set()
+        for path in old - set(self.pos):
+            touched |= self._drop(path)
+        for path in self.pos:
+            if path not in old:
+                touched |= self._add(path, index[path])
+        return touched
+
+    def _add(self, path: str, facts: Facts) -> set[str]:
+        self.index[path] = facts
+        for table, pairs in ((self.ids, facts.ids), (self.labels, facts.labels), (self.refs, facts.xrefs)):
+            for val, lineno in pairs:
+                table[val].setdefault(path, []).append(lineno)
+        t0 = time.perf_counter()
+        self.local[path] = file_findings(path, facts, self.assets)
+        elapsed = time.perf_counter() - t0
+        self.timings["file-checks"] += elapsed
+        self.file_times[path] = self.cache.times.get(path, 0.0) + elapsed
+        return _keys(facts)
+
+    def _drop(self, path: str) -> set[str]:
+        facts = self.index.pop(path, None)
+        if facts is None:
+            return set()
+        for table, pairs in ((self.ids, facts.ids), (self.labels, facts.labels), (self.refs, facts.xrefs)):
+            for val, _lineno in pairs:
+                table[val].pop(path, None)
+                if not table[val]:
+                    del table[val]
+        self.local.pop(path, None)
+        return _keys(facts)
+
+    def _recheck(self, keys: set[str]) -> None:
+        """Re-evaluate duplicate-id and dangling-xref status for just these values."""
+        for key in keys:
+            if sum(map(len, self.ids.get(key, {}).values())) > 1:
+                self.dups.add(key)
+            else:
+                self.dups.discard(key)
+            # a ref may target an xml:id OR a label
+            if key in self.refs and key not in self.ids and key not in self.labels:
+                self.dangling.add(key)
+            else:
+                self.dangling.discard(key)
+
+    def _sites(self, table: dict[str, dict[str, list[int]]], key: str) -> list[tuple[str, int]]:
+        """(file, line) occurrences of `key`, in document order."""
+        return sorted(((p, n) for p, lines in table[key].items() for n in lines),
+                      key=lambda site: (self.pos[site[0]], site[1]))
+
+    def findings(self) -> list[Finding]:
+        """Current findings (errors and warnings), in a stable document order."""
+        with self._timed("include-graph-checks"):
+            found = graph_findings(self.graph)
+        for path in self.pos:
+            found.extend(self.local[path])
+        # duplicate ids
+        with self._timed("dup-xml:id"):
+            for _id in sorted(self.dups):
+                sites = self._sites(self.ids, _id)
+                locs = [f"{rel(p)}:{n}" for p, n in sites]
+                found.append(Finding("ERROR", "dup-xml:id", rel(sites[0][0]), sites[0][1],
+                                     f"xml:id=\"{_id}\" defined {len(locs)}x: {', '.join(locs)}"))
+        # dangling xrefs
+        with self._timed("dangling-xref"):
+            dangling = sorted((self.pos[p], n, ref, p)
+                              for ref in self.dangling for p, n in self._sites(self.refs, ref))
+            for _pos, n, ref, p in dangling:
+                found.append(Finding("ERROR", "dangling-xref", rel(p), n,
+                                     f"{rel(p)}:{n}  <xref ref=\"{ref}\"> has no matching "
+                                     f"xml:id/label"))
+        # orphan .ptx files (present under source/ but not reachable from main.ptx)
+        with self._timed("orphan-file"):
+            for path in sorted(self.sources - set(self.graph.order)):
+                found.append(Finding("WARN", "orphan-file", rel(path), None,
+                                     f"{rel(path)} is not xi:included from main.ptx "
+                                     f"(backup/dev/unfinished?)"))
+        # image files under assets/ that nothing in the book references
+        if self.unused_assets:
+            with self._timed("unused-asset"):
+                used = {self.assets.lookup(src) for facts in self.index.values() for src, _ in facts.images}
+                for path in self.assets.unreferenced(used):
+                    found.append(Finding("WARN", "unused-asset", f"assets/{path}", None,
+                                         f"assets/{path} is not referenced by any <image source>"))
+        return found
+
+    def stats(self) -> dict:
+        """Counts and timings for the structured reports (times in milliseconds)."""
+        return {
+            "files": len(self.pos),
+            "source_files": len(self.sources),
+            "ids": sum(map(len, (f.ids for f in self.index.values()))),
+            "labels": sum(map(len, (f.labels for f in self.index.values()))),
+            "xrefs": sum(map(len, (f.xrefs for f in self.index.values()))),
+            "images": sum(map(len, (f.images for f in self.index.values()))),
+            "assets": len(self.assets.exact),
+            "cache": {"hits": self.cache.hits, "misses": self.cache.misses},
+            "timings_ms": {k: round(v * 1000, 3) for k, v in self.timings.items()},
+            "file_timings_ms": {rel(p): round(self.file_times.get(p, 0.0) * 1000, 3) for p in self.pos},
+        }
 
 
 def main() -> int:
+    ap = argparse.ArgumentParser(description="Repo-specific PreTeXt linter for the ISCAM book.")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="re-tokenize every file and do not read/write .ptxlint-cache/")
+    ap.add_argument("--unused-assets", action="store_true",
+                    help="also warn about image files under assets/ that no <image> references")
+    ap.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                    help="tokenize files in N worker processes (0 = one per CPU; default 1)")
+    ap.add_argument("--watch", action="store_true",
+                    help="stay resident and re-lint changed files as they are saved (Ctrl+C to stop)")
+    ap.add_argument("--format", choices=("text", "json", "sarif"), default="text",
+                    help="text (default), json (JSON lines: one finding per line + a summary line) or sarif")
+    ap.add_argument("--output", "-o", default=None, metavar="PATH",
+                    help="write the report to PATH instead of stdout")
+    ap.add_argument("--timings", action="store_true",
+                    help="(text format) also print counts and the per-check/slowest-file timing breakdown")
+    args = ap.parse_args()
+    if args.watch and args.format != "text":
+        ap.error("--watch only supports --format text")
+
     if not os.path.exists(MAIN):
         print(f"FATAL: {rel(MAIN)} not found — run from repo root.", file=sys.stderr)
         return 2
 
-    included = resolve_includes(MAIN)
-    included_set = set(included)
-
-    ids: dict[str, list[str]] = defaultdict(list)   # id -> [locations]
-    labels: dict[str, list[str]] = defaultdict(list)
-    xrefs: list[tuple[str, str]] = []               # (ref, location)
-
-    for path in included:
-        for lineno, line in enumerate(lines_of(path), 1):
-            loc = f"{rel(path)}:{lineno}"
-            for m in RE_XMLID.finditer(line):
-                ids[m.group(1)].append(loc)
-            for m in RE_LABEL.finditer(line):
-                val = m.group(1)
-                labels[val].append(loc)
-                if "." in val:
-                    errors.append(f"[dotted-label] {loc}  label=\"{val}\" — periods are rejected by "
-                                  f"pretext>=~2.40 (use hyphens/underscores)")
-            for m in RE_XREF.finditer(line):
-                xrefs.append((m.group(1), loc))
-            for m in RE_IMAGE.finditer(line):
-                check_image(m.group(1), loc)
-            if RE_P_BLOCKLIST.search(line):
-                errors.append(f"[p-wraps-list] {loc}  a <p> directly wraps a <ul>/<ol> block "
-                              f"(deprecated; the list should not be inside <p>)")
-
-    # duplicate ids
-    for _id, locs in sorted(ids.items()):
-        if len(locs) > 1:
-            errors.append(f"[dup-xml:id] xml:id=\"{_id}\" defined {len(locs)}x: {', '.join(locs)}")
-
-    # dangling xrefs (a ref may target an xml:id OR a label)
-    valid_targets = set(ids) | set(labels)
-    for ref, loc in xrefs:
-        if ref not in valid_targets:
-            errors.append(f"[dangling-xref] {loc}  <xref ref=\"{ref}\"> has no matching xml:id/label")
-
-    # orphan .ptx files (present under source/ but not reachable from main.ptx)
-    for dirpath, _dirs, files in os.walk(SOURCE):
-        for fn in files:
-            if fn.endswith(".ptx"):
-                full = os.path.normpath(os.path.join(dirpath, fn))
-                if full not in included_set:
-                    warns.append(f"[orphan-file] {rel(full)} is not xi:included from main.ptx "
-                                 f"(backup/dev/unfinished?)")
+    started = time.perf_counter()
+    cache = FactCache(None if args.no_cache else CACHE_FILE)
+    jobs = args.jobs or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        linter = Linter(cache, pool, unused_assets=args.unused_assets)
+        linter.scan()
+        cache.save()
+        found = linter.findings()
+        stats = linter.stats()
+        stats["total_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            if args.format == "json":
+                write_jsonl(found, stats, out)
+            elif args.format == "sarif":
+                write_sarif(found, stats, out)
+            else:
+                report(found, out)
+                if args.timings:
+                    report_timings(stats, out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if args.watch:
+            watch(linter)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return 1 if any(f.severity == "ERROR" for f in found) else 0
+
 
-    report()
-    return 1 if errors else 0
+def _stamp(path: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def watch(linter: Linter, interval: float = 0.1) -> None:
+    """Poll source/ (and every included file) for changes; print new/resolved findings.
+
+    Polling keeps this dependency-free; a stat of the ~200 source files every
+    `interval` seconds is cheap. Changes under assets/ are noticed through the
+    directory mtimes and trigger a re-walk of assets/ plus the image checks.
+    """
+    def snapshot() -> tuple[dict[str, tuple[int, int] | None], tuple]:
+        files = {p: _stamp(p) for p in set(ptx_files()) | set(linter.pos)}
+        dirs = tuple(_stamp(d) for d, _sub, _files in os.walk(ASSETS))
+        return files, dirs
+
+    shown = set(linter.findings())
+    files, dirs = snapshot()
+    print(f"\nptx_lint: watching {rel(SOURCE)}/ and {rel(ASSETS)}/ (Ctrl+C to stop) ...", flush=True)
+    try:
+        while True:
+            time.sleep(interval)
+            new_files, new_dirs = snapshot()
+            changed = {p for p in files.keys() | new_files.keys() if files.get(p) != new_files.get(p)}
+            assets_changed = new_dirs != dirs
+            files, dirs = new_files, new_dirs
+            if not changed and not assets_changed:
+                continue
+            t0 = time.perf_counter()
+            if changed:
+                linter.update(changed)
+            if assets_changed:
+                linter.refresh_assets()
+            now = set(linter.findings())
+            ms = (time.perf_counter() - t0) * 1000
+            n_err = sum(f.severity == "ERROR" for f in now)
+            what = ", ".join(sorted(rel(p) for p in changed)) or "assets/"
+            print(f"\n[{time.strftime('%H:%M:%S')}] {what} — re-linted in {ms:.0f} ms; "
+                  f"{n_err} error(s), {len(now) - n_err} warning(s)")
+            for f in sorted(now - shown, key=str):
+                print(f"  + {f.severity:5} {f}")
+            for f in sorted(shown - now, key=str):
+                print(f"  - {f.severity:5} (resolved) {f}")
+            shown = now
+            linter.cache.save()
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+
+
+class AssetIndex:
+    """One walk of assets/, giving O(1) exact-case and case-insensitive path lookups.
+
+    Paths are stored relative to assets/ with forward slashes, the same form used
+    by <image source="...">.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.exact: set[str] = set()
+        self.lower: dict[str, str] = {}
+        for dirpath, _dirs, files in os.walk(root):
+            base = os.path.relpath(dirpath, root).replace("\\", "/")
+            for fn in files:
+                path = fn if base == "." else f"{base}/{fn}"
+                self.exact.add(path)
+                self.lower.setdefault(path.lower(), path)
 
+    def lookup(self, source: str) -> str | None:
+        """The on-disk path for `source` (possibly differing in case), or None."""
+        return source if source in self.exact else self.lower.get(source.lower())
 
-def check_image(source: str, loc: str) -> None:
+    def unreferenced(self, used: set[str | None]) -> list[str]:
+        """Image files under assets/ not in `used` (the resolved <image> sources)."""
+        return sorted(p for p in self.exact - used if p.lower().endswith(IMAGE_EXTS))
+
+
+def check_image(source: str, where: str, lineno: int, assets: AssetIndex) -> list[Finding]:
+    loc = f"{where}:{lineno}"
+    out: list[Finding] = []
     if "(" in source or ")" in source:
-        warns.append(f"[image-parens] {loc}  <image source=\"{source}\"> contains parentheses "
-                     f"(repo convention forbids them in image filenames)")
-    # resolve against assets/ with exact-case checking, segment by segment
-    parts = source.split("/")
-    cur = ASSETS
-    for seg in parts:
-        if not os.path.isdir(cur):
-            errors.append(f"[image-missing] {loc}  <image source=\"{source}\"> not found under assets/")
-            return
-        entries = os.listdir(cur)
-        if seg in entries:
-            cur = os.path.join(cur, seg)
-        else:
-            lower = {e.lower(): e for e in entries}
-            if seg.lower() in lower:
-                errors.append(f"[image-case] {loc}  <image source=\"{source}\"> — case mismatch: "
-                              f"source has \"{seg}\" but file on disk is \"{lower[seg.lower()]}\" "
-                              f"(works on Windows, BREAKS on Runestone Linux)")
-                cur = os.path.join(cur, lower[seg.lower()])
-            else:
-                errors.append(f"[image-missing] {loc}  <image source=\"{source}\"> not found under assets/")
-                return
+        out.append(Finding("WARN", "image-parens", where, lineno,
+                           f"{loc}  <image source=\"{source}\"> contains parentheses "
+                           f"(repo convention forbids them in image filenames)"))
+    # resolve against assets/ with exact-case checking
+    found = assets.lookup(source)
+    if found is None:
+        out.append(Finding("ERROR", "image-missing", where, lineno,
+                           f"{loc}  <image source=\"{source}\"> not found under assets/"))
+    elif found != source:
+        seg, disk = next((s, d) for s, d in zip(source.split("/"), found.split("/")) if s != d)
+        out.append(Finding("ERROR", "image-case", where, lineno,
+                           f"{loc}  <image source=\"{source}\"> — case mismatch: "
+                           f"source has \"{seg}\" but file on disk is \"{disk}\" "
+                           f"(works on Windows, BREAKS on Runestone Linux)"))
+    return out
 
 
-def report() -> None:
+def report(found: list[Finding], out: TextIO = sys.stdout) -> None:
+    errors = [f for f in found if f.severity == "ERROR"]
+    warns = [f for f in found if f.severity == "WARN"]
     if errors:
-        print(f"\n=== {len(errors)} ERROR-level finding(s) ===")
+        print(f"\n=== {len(errors)} ERROR-level finding(s) ===", file=out)
         for e in errors:
-            print("  ERROR " + e)
+            print(f"  ERROR {e}", file=out)
     if warns:
-        print(f"\n=== {len(warns)} WARN-level finding(s) ===")
+        print(f"\n=== {len(warns)} WARN-level finding(s) ===", file=out)
         for w in warns:
-            print("  WARN  " + w)
+            print(f"  WARN  {w}", file=out)
     if not errors and not warns:
-        print("ptx_lint: clean — no findings.")
+        print("ptx_lint: clean — no findings.", file=out)
     else:
-        print(f"\nptx_lint summary: {len(errors)} error(s), {len(warns)} warning(s).")
+        print(f"\nptx_lint summary: {len(errors)} error(s), {len(warns)} warning(s).", file=out)
+
+
+def report_timings(stats: dict, out: TextIO = sys.stdout, slowest: int = 10) -> None:
+    print(f"\n=== counts ===\n  {stats['files']} included file(s) of {stats['source_files']} under source/; "
+          f"{stats['ids']} xml:id, {stats['labels']} label, {stats['xrefs']} xref, "
+          f"{stats['images']} image; cache {stats['cache']['hits']} hit(s), "
+          f"{stats['cache']['misses']} miss(es)", file=out)
+    print(f"\n=== timings (total {stats['total_ms']:.1f} ms) ===", file=out)
+    for what, ms in sorted(stats["timings_ms"].items(), key=lambda kv: -kv[1]):
+        print(f"  {ms:9.2f} ms  {what}", file=out)
+    print(f"\n=== {slowest} slowest file(s) ===", file=out)
+    for path, ms in sorted(stats["file_timings_ms"].items(), key=lambda kv: -kv[1])[:slowest]:
+        print(f"  {ms:9.2f} ms  {path}", file=out)
+
+
+def write_jsonl(found: list[Finding], stats: dict, out: TextIO) -> None:
+    """One {"type": "finding", ...} object per line, then one {"type": "summary", ...}."""
+    for f in found:
+        out.write(json.dumps({"type": "finding", **f._asdict()}, ensure_ascii=False) + "\n")
+    n_err = sum(f.severity == "ERROR" for f in found)
+    summary = {"type": "summary", "errors": n_err, "warnings": len(found) - n_err, **stats}
+    out.write(json.dumps(summary, ensure_ascii=False) + "\n")
+
+
+def write_sarif(found: list[Finding], stats: dict, out: TextIO) -> None:
+    """SARIF 2.1.0 (what GitHub code scanning and most CI annotators ingest)."""
+    results = []
+    for f in found:
+        result: dict = {"ruleId": f.code, "level": "error" if f.severity == "ERROR" else "warning",
+                        "message": {"text": str(f)}}
+        if f.file:
+            loc: dict = {"artifactLocation": {"uri": f.file, "uriBaseId": "REPO"}}
+            if f.line:
+                loc["region"] = {"startLine": f.line}
+            result["locations"] = [{"physicalLocation": loc}]
+        results.append(result)
+    sarif = {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {
+                "name": "ptx_lint",
+                "rules": [{"id": code, "shortDescription": {"text": desc}} for code, desc in CHECKS.items()],
+            }},
+            "originalUriBaseIds": {"REPO": {"uri": "file:///" + REPO.replace("\\", "/").lstrip("/") + "/"}},
+            "results": results,
+            "properties": stats,
+        }],
+    }
+    json.dump(sarif, out, ensure_ascii=False, indent=1)
+    out.write("\n")
 
 
 if __name__ == "__main__":
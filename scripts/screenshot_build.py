@@ -5,9 +5,13 @@ Lets a (headless) reviewer visually check what the local build actually looks
 like — MathJax formulas rendered, images loaded, tables laid out — which the raw
 HTML text can't show. The PNG can then be opened/inspected directly.
 
-Serves output/<target>/ over a local HTTP server (so relative CSS/JS and MathJax
-resolve exactly as in a browser), loads one page, waits for MathJax to finish,
-and screenshots either the whole page or a single element by CSS selector.
+Serves output/<target>/ over a local HTTP server (preview_server.py: threaded,
+compressed, so relative CSS/JS and MathJax resolve exactly as in a browser),
+loads one page, waits until it is actually ready (MathJax typeset, fonts loaded,
+images decoded — no fixed sleeps), and screenshots either the whole page or a
+single element by CSS selector. The time each page took to become ready is
+printed (and recorded in batch manifests), which also shows which investigations
+render slowly for students.
 
 Prereqs (one-time; NOT in requirements.txt — this is an optional QA tool):
     uv pip install playwright
@@ -22,74 +26,239 @@ Build first, then screenshot. Examples (from repo root):
     # a different target dir:
     uv run python scripts/screenshot_build.py inv-5-7.html "$SCRATCH/x.png" --target html
 
+Batch mode captures many pages with ONE server and ONE browser, several pages at
+a time (--concurrency browser contexts), and writes <out-dir>/manifest.json:
+    # every investigation page, whole page:
+    uv run python scripts/screenshot_build.py --batch "inv-*.html" --out-dir "$SCRATCH/shots"
+    # from a list file, one "page.html[<TAB>selector]" per line (# comments allowed):
+    uv run python scripts/screenshot_build.py --batch-file pages.tsv --out-dir "$SCRATCH/shots"
+
 Then Read the PNG to view it. Write PNGs to the scratchpad, not the repo.
 """
+from __future__ import annotations
 import argparse
-import functools
-import http.server
+import asyncio
+import fnmatch
+import json
 import os
+import re
 import socketserver
-import threading
+import time
 
 REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
-def serve(directory: str) -> tuple[socketserver.TCPServer, int]:
-    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=directory)
-    httpd = socketserver.TCPServer(("127.0.0.1", 0), handler)  # port 0 = pick a free port
-    port = httpd.server_address[1]
-    threading.Thread(target=httpd.serve_forever, daemon=True).start()
-    return httpd, port
+def serve(directory: str, latency_ms: float = 0) -> tuple[socketserver.TCPServer, int]:
+    """Serve `directory` on a free port with preview_server (threaded, gzip, ETags)."""
+    import preview_server
+
+    return preview_server.serve(directory, latency_ms=latency_ms)
+
+
+def shot_name(page: str, selector: str | None) -> str:
+    """PNG filename for a batch capture, e.g. inv-5-7.html + ".foo" -> inv-5-7--foo.png."""
+    base = os.path.splitext(page)[0].replace("/", "_")
+    if selector:
+        base += "--" + (re.sub(r"[^A-Za-z0-9_-]+", "-", selector).strip("-") or "sel")
+    return base + ".png"
+
+
+def batch_jobs(outdir: str, pattern: str | None, list_file: str | None,
+               selector: str | None) -> list[tuple[str, str | None]]:
+    """(page, selector) pairs from a glob over the output dir and/or a list file."""
+    jobs: list[tuple[str, str | None]] = []
+    if pattern:
+        pages = sorted(f for f in os.listdir(outdir) if fnmatch.fnmatch(f, pattern))
+        jobs.extend((p, selector) for p in pages)
+    if list_file:
+        with open(list_file, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                page, _, sel = line.partition("\t")
+                jobs.append((page.strip(), sel.strip() or selector))
+    return jobs
+
+
+# Resolves once the page is really ready to photograph, and reports when each stage
+# finished (ms since navigation start). No fixed sleeps: it waits on the real
+# signals — window load, MathJax's startup promise (initial typeset) and typeset
+# state, font loading, and decode() of every image (lazy ones are made eager so a
+# full-page shot includes them) — then one frame so the result is painted.
+READY_JS = """async (timeoutMs) => {
+  const marks = {};
+  const mark = (k) => { marks[k] = Math.round(performance.now()); };
+  const ready = (async () => {
+    if (document.readyState !== "complete") {
+      await new Promise((r) => addEventListener("load", r, { once: true }));
+    }
+    mark("load");
+    const mj = window.MathJax;
+    if (mj && mj.startup && mj.startup.promise) {
+      await mj.startup.promise;
+      const doc = mj.startup.document;
+      while (doc && doc.state && doc.state() < 10) {
+        await new Promise((r) => requestAnimationFrame(r));
+      }
+      mark("mathjax");
+    }
+    await document.fonts.ready;
+    mark("fonts");
+    const imgs = Array.from(document.images);
+    for (const img of imgs) if (img.loading === "lazy") img.loading = "eager";
+    await Promise.all(imgs.map((img) => img.decode().catch(() => null)));
+    mark("images");
+    await new Promise((r) => requestAnimationFrame(() => requestAnimationFrame(r)));
+    mark("ready");
+    return false;
+  })();
+  const timedOut = await Promise.race([
+    ready, new Promise((r) => setTimeout(() => r(true), timeoutMs)),
+  ]);
+  return { timedOut, marks, images: document.images.length };
+}"""
+
+
+async def capture(context, url: str, out: str, selector: str | None,
+                  ready_timeout: int = 15000) -> tuple[str | None, dict]:
+    """Load `url` in a fresh tab of `context` and screenshot it once it is ready.
+
+    Returns (warning or None, readiness info from READY_JS).
+    """
+    page = await context.new_page()
+    try:
+        await page.goto(url, wait_until="load")
+        ready = await page.evaluate(READY_JS, ready_timeout)
+        warning = None
+        if ready["timedOut"]:
+            warning = f"not ready after {ready_timeout} ms (captured anyway)"
+        if selector:
+            el = await page.query_selector(selector)
+            if el is None:
+                await page.screenshot(path=out, full_page=True)
+                return f"selector {selector!r} not found; captured full page instead", ready
+            await el.screenshot(path=out)
+        else:
+            await page.screenshot(path=out, full_page=True)
+        return warning, ready
+    finally:
+        await page.close()
+
+
+async def run(base_url: str, jobs: list[tuple[str, str | None, str]], width: int,
+              concurrency: int, ready_timeout: int = 15000) -> list[dict]:
+    """Capture (page, selector, out) jobs with one browser and `concurrency` contexts."""
+    from playwright.async_api import async_playwright
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for i, job in enumerate(jobs):
+        queue.put_nowait((i, job))
+    results: list[dict] = [{} for _ in jobs]
+
+    async def worker(browser) -> None:
+        context = await browser.new_context(viewport={"width": width, "height": 1400})
+        try:
+            while not queue.empty():
+                i, (page, selector, out) = queue.get_nowait()
+                t0 = time.perf_counter()
+                entry = {"page": page, "selector": selector, "png": out}
+                try:
+                    warning, ready = await capture(context, f"{base_url}/{page}", out, selector,
+                                                   ready_timeout)
+                    entry["status"] = "warn" if warning else "ok"
+                    entry["ready_ms"] = ready["marks"].get("ready")
+                    entry["ready"] = ready["marks"]
+                    if warning:
+                        entry["message"] = warning
+                except Exception as exc:  # keep going; record the failure in the manifest
+                    entry["status"] = "error"
+                    entry["message"] = str(exc).splitlines()[0] if str(exc) else type(exc).__name__
+                entry["ms"] = round((time.perf_counter() - t0) * 1000)
+                results[i] = entry
+                ready_at = f"ready@{entry['ready_ms']} ms" if entry.get("ready_ms") is not None else ""
+                print(f"{entry['status']:5} {entry['ms']:6} ms {ready_at:>15}  {page}"
+                      + (f"  [{selector}]" if selector else "")
+                      + (f"  — {entry['message']}" if "message" in entry else ""), flush=True)
+        finally:
+            await context.close()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        try:
+            await asyncio.gather(*(worker(browser) for _ in range(max(1, min(concurrency, len(jobs))))))
+        finally:
+            await browser.close()
+    return results
 
 
 def main() -> int:
     ap = argparse.ArgumentParser()
-    ap.add_argument("page", help="HTML filename within the target output dir, e.g. inv-5-7.html")
-    ap.add_argument("out", help="output PNG path (write to the scratchpad, not the repo)")
+    ap.add_argument("page", nargs="?", help="HTML filename within the target output dir, e.g. inv-5-7.html")
+    ap.add_argument("out", nargs="?", help="output PNG path (write to the scratchpad, not the repo)")
     ap.add_argument("--target", default="runestone", help="output/<target> dir (default: runestone)")
     ap.add_argument("--selector", default=None, help="optional CSS selector to screenshot one element")
     ap.add_argument("--width", type=int, default=1100)
+    ap.add_argument("--batch", metavar="GLOB", help='batch mode: pages matching GLOB, e.g. "inv-*.html"')
+    ap.add_argument("--batch-file", metavar="FILE",
+                    help="batch mode: pages (and optional TAB-separated selector) listed one per line")
+    ap.add_argument("--out-dir", help="batch mode: directory for the PNGs and manifest.json")
+    ap.add_argument("--ready-timeout", type=int, default=15000, metavar="MS",
+                    help="give up waiting for MathJax/fonts/images after MS and capture anyway")
+    ap.add_argument("--concurrency", type=int, default=4,
+                    help="batch mode: pages captured at once (browser contexts; default 4)")
+    ap.add_argument("--latency", type=float, default=0, metavar="MS",
+                    help="delay every request by MS to approximate a real host (ready times get realistic)")
     args = ap.parse_args()
 
     outdir = os.path.join(REPO, "output", args.target)
-    if not os.path.isfile(os.path.join(outdir, args.page)):
-        print(f"ERROR: {args.page} not found in output/{args.target}/ — run `pretext build {args.target}` first.")
+    if not os.path.isdir(outdir):
+        print(f"ERROR: output/{args.target}/ does not exist — run `pretext build {args.target}` first.")
+        return 2
+    if args.batch or args.batch_file:
+        if not args.out_dir:
+            ap.error("--batch/--batch-file need --out-dir")
+        found = batch_jobs(outdir, args.batch, args.batch_file, args.selector)
+        missing = [p for p, _ in found if not os.path.isfile(os.path.join(outdir, p))]
+        for p in missing:
+            print(f"WARN: {p} not found in output/{args.target}/ — skipped.")
+        os.makedirs(args.out_dir, exist_ok=True)
+        jobs = [(p, sel, os.path.join(args.out_dir, shot_name(p, sel))) for p, sel in found if p not in missing]
+    else:
+        if not (args.page and args.out):
+            ap.error("give <page> <out.png>, or --batch/--batch-file with --out-dir")
+        if not os.path.isfile(os.path.join(outdir, args.page)):
+            print(f"ERROR: {args.page} not found in output/{args.target}/ — run `pretext build {args.target}` first.")
+            return 2
+        jobs = [(args.page, args.selector, args.out)]
+    if not jobs:
+        print(f"ERROR: no pages to capture in output/{args.target}/ — run `pretext build {args.target}` first?")
         return 2
 
-    from playwright.sync_api import sync_playwright
-
-    httpd, port = serve(outdir)
-    url = f"http://127.0.0.1:{port}/{args.page}"
+    httpd, port = serve(outdir, args.latency)
+    t0 = time.perf_counter()
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page(viewport={"width": args.width, "height": 1400})
-            page.goto(url, wait_until="networkidle")
-            # Wait for MathJax (if present) to finish typesetting so formulas render.
-            page.wait_for_timeout(500)
-            try:
-                page.wait_for_function(
-                    "() => !window.MathJax || !MathJax.startup || "
-                    "MathJax.startup.document.state() >= 10",
-                    timeout=8000,
-                )
-            except Exception:
-                pass  # no MathJax / already done
-            page.wait_for_timeout(500)
-            if args.selector:
-                el = page.query_selector(args.selector)
-                if el is None:
-                    print(f"WARN: selector {args.selector!r} not found; capturing full page instead.")
-                    page.screenshot(path=args.out, full_page=True)
-                else:
-                    el.screenshot(path=args.out)
-            else:
-                page.screenshot(path=args.out, full_page=True)
-            browser.close()
+        results = asyncio.run(run(f"http://127.0.0.1:{port}", jobs, args.width, args.concurrency,
+                                  args.ready_timeout))
     finally:
         httpd.shutdown()
 
-    print(f"wrote {args.out}")
+    if args.out_dir and (args.batch or args.batch_file):
+        manifest = os.path.join(args.out_dir, "manifest.json")
+        with open(manifest, "w", encoding="utf-8") as f:
+            json.dump({"target": args.target, "width": args.width,
+                       "seconds": round(time.perf_counter() - t0, 2), "shots": results}, f, indent=1)
+        failed = sum(r.get("status") == "error" for r in results)
+        print(f"captured {len(results) - failed}/{len(results)} page(s); manifest -> {manifest}")
+        return 1 if failed else 0
+    result = results[0]
+    if result.get("status") == "error":
+        print(f"ERROR: {result.get('message')}")
+        return 1
+    if result.get("status") == "warn":
+        print(f"WARN: {result['message']}")
+    ready_at = f" (page ready after {result['ready_ms']} ms)" if result.get("ready_ms") is not None else ""
+    print(f"wrote {args.out}{ready_at}")
     return 0
 
 
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+"""visual_diff.py — which built pages LOOK different since the last accepted baseline?
+
+After a CSS bump or a content edit, captures pages of output/<target>/ with
+screenshot_build.py's batch machinery and compares them, pixel by pixel (NumPy,
+with a tolerance), against a stored baseline. Only pages whose rendering changed
+are reported, each with a diff image highlighting the changed pixels.
+
+Capture is skipped for any page whose *fingerprint* — the built HTML plus the
+local stylesheets/scripts it links, and the capture width — is unchanged: a page
+matching the baseline fingerprint is unchanged by definition, and one matching
+the last capture reuses that PNG. So after a one-file edit only that page is shot.
+
+Prereqs (optional QA tool, like screenshot_build.py):
+    uv pip install playwright numpy pillow
+    uv run playwright install chromium
+
+Usage (from repo root; state lives in .visual-baseline/<target>/, git-ignored):
+    pretext build runestone
+    uv run python scripts/visual_diff.py --batch "inv-*.html"           # first run: records the baseline
+    # ... edit CSS/source, rebuild ...
+    uv run python scripts/visual_diff.py --batch "inv-*.html"           # report + diff PNGs for changed pages
+    uv run python scripts/visual_diff.py --batch "inv-*.html" --accept  # make the current shots the baseline
+
+Exit code is 1 if any page changed (so it can gate CI), else 0.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from screenshot_build import REPO, batch_jobs, run, serve, shot_name
+
+STORE = os.path.join(REPO, ".visual-baseline")
+RE_LOCAL_ASSET = re.compile(r'<(?:link|script)\b[^>]*\b(?:href|src)="(?!https?:|//|data:)([^"#?]+)', re.I)
+
+
+def fingerprint(outdir: str, page: str, selector: str | None, width: int) -> str:
+    """Hash of the page's HTML, the local CSS/JS it links, and the capture settings."""
+    h = hashlib.sha1(f"{selector}\0{width}\0".encode())
+    path = os.path.join(outdir, page)
+    with open(path, "rb") as f:
+        html = f.read()
+    h.update(html)
+    base = os.path.dirname(path)
+    for ref in sorted(set(RE_LOCAL_ASSET.findall(html.decode("utf-8", errors="replace")))):
+        try:
+            with open(os.path.normpath(os.path.join(base, ref)), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b"missing:" + ref.encode())
+    return h.hexdigest()
+
+
+def compare(a_png: str, b_png: str, diff_png: str, tolerance: int,
+            max_ratio: float) -> tuple[bool, float, str | None]:
+    """(changed, fraction of pixels off by more than `tolerance`, note) for two PNGs.
+
+    Writes a diff image (changed pixels red over a faded copy of `b_png`) when changed.
+    """
+    import numpy as np
+    from PIL import Image
+
+    a = np.asarray(Image.open(a_png).convert("RGB"), dtype=np.int16)
+    b = np.asarray(Image.open(b_png).convert("RGB"), dtype=np.int16)
+    if a.shape != b.shape:
+        # compare the common area so the diff image still points at what moved
+        h, w = min(a.shape[0], b.shape[0]), min(a.shape[1], b.shape[1])
+        note = f"size {a.shape[1]}x{a.shape[0]} -> {b.shape[1]}x{b.shape[0]}"
+        a, b = a[:h, :w], b[:h, :w]
+    else:
+        note = None
+    mask = np.abs(a - b).max(axis=2) > tolerance
+    ratio = float(mask.mean()) if mask.size else 1.0
+    changed = note is not None or ratio > max_ratio
+    if changed:
+        out = (b * 0.3 + 178).astype(np.uint8)
+        out[mask] = (255, 0, 0)
+        Image.fromarray(out).save(diff_png)
+    return changed, ratio, note
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Visual regression check for built pages.")
+    ap.add_argument("--target", default="runestone", help="output/<target> dir (default: runestone)")
+    ap.add_argument("--batch", metavar="GLOB", help='pages matching GLOB, e.g. "inv-*.html"')
+    ap.add_argument("--batch-file", metavar="FILE",
+                    help="pages (and optional TAB-separated selector) listed one per line")
+    ap.add_argument("--selector", default=None, help="CSS selector to capture instead of the whole page")
+    ap.add_argument("--width", type=int, default=1100)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--tolerance", type=int, default=16,
+                    help="per-channel difference (0-255) below which a pixel counts as equal (default 16)")
+    ap.add_argument("--max-ratio", type=float, default=0.0005,
+                    help="fraction of differing pixels tolerated before a page counts as changed")
+    ap.add_argument("--accept", action="store_true", help="make the current captures the new baseline")
+    args = ap.parse_args()
+    if not (args.batch or args.batch_file):
+        ap.error("give --batch GLOB and/or --batch-file FILE")
+
+    outdir = os.path.join(REPO, "output", args.target)
+    if not os.path.isdir(outdir):
+        print(f"ERROR: output/{args.target}/ does not exist — run `pretext build {args.target}` first.")
+        return 2
+    store = os.path.join(STORE, args.target)
+    dirs = {k: os.path.join(store, k) for k in ("baseline", "current", "diff")}
+    for d in dirs.values():
+        os.makedirs(d, exist_ok=True)
+    state_path = os.path.join(store, "state.json")
+    state = {"baseline": {}, "current": {}}
+    if os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+
+    # decide what actually needs a browser
+    pages = []
+    to_shoot = []
+    for page, sel in batch_jobs(outdir, args.batch, args.batch_file, args.selector):
+        if not os.path.isfile(os.path.join(outdir, page)):
+            print(f"WARN: {page} not found in output/{args.target}/ — skipped.")
+            continue
+        name = shot_name(page, sel)
+        fp = fingerprint(outdir, page, sel, args.width)
+        pages.append((name, page, sel, fp))
+        base, cur = state["baseline"].get(name), state["current"].get(name)
+        if base and base["fp"] == fp:
+            continue                        # identical inputs -> identical rendering
+        if cur and cur["fp"] == fp and os.path.exists(os.path.join(dirs["current"], name)):
+            continue                        # already captured for these inputs
+        to_shoot.append((page, sel, os.path.join(dirs["current"], name)))
+        state["current"][name] = {"page": page, "selector": sel, "fp": fp}
+
+    print(f"{len(pages)} page(s); {len(to_shoot)} need capturing, "
+          f"{len(pages) - len(to_shoot)} unchanged or already captured")
+    if to_shoot:
+        httpd, port = serve(outdir)
+        try:
+            results = asyncio.run(run(f"http://127.0.0.1:{port}", to_shoot, args.width, args.concurrency))
+        finally:
+            httpd.shutdown()
+        for (page, sel, _out), res in zip(to_shoot, results):
+            if res.get("status") == "error":
+                state["current"].pop(shot_name(page, sel), None)
+
+    report = []
+    for name, page, sel, fp in pages:
+        base = state["baseline"].get(name)
+        cur_png = os.path.join(dirs["current"], name)
+        base_png = os.path.join(dirs["baseline"], name)
+        if base and base["fp"] == fp:
+            continue
+        if name not in state["current"]:
+            report.append({"page": page, "selector": sel, "status": "error"})
+            continue
+        if not base or not os.path.exists(base_png):
+            report.append({"page": page, "selector": sel, "status": "new", "png": cur_png})
+            continue
+        diff_png = os.path.join(dirs["diff"], name)
+        changed, ratio, note = compare(base_png, cur_png, diff_png, args.tolerance, args.max_ratio)
+        if changed:
+            report.append({"page": page, "selector": sel, "status": "changed", "ratio": round(ratio, 6),
+                           "note": note, "png": cur_png, "baseline": base_png, "diff": diff_png})
+        elif os.path.exists(diff_png):
+            os.remove(diff_png)
+        if not changed:             # pixel-equal: adopt the new fingerprint, nothing to review
+            state["baseline"][name] = state["current"][name]
+            shutil.copyfile(cur_png, base_png)
+
+    if args.accept or not state["baseline"]:
+        for name, page, sel, fp in pages:
+            cur = state["current"].get(name)
+            if cur and cur["fp"] == fp and os.path.exists(os.path.join(dirs["current"], name)):
+                shutil.copyfile(os.path.join(dirs["current"], name), os.path.join(dirs["baseline"], name))
+                state["baseline"][name] = cur
+        print(f"baseline updated ({len(state['baseline'])} page(s))")
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    with open(os.path.join(store, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+
+    changed = [r for r in report if r["status"] in ("changed", "error")]
+    for r in report:
+        extra = f"  {r['ratio'] * 100:.2f}% px" if "ratio" in r else ""
+        extra += f"  ({r['note']})" if r.get("note") else ""
+        print(f"  {r['status']:8} {r['page']}" + (f" [{r['selector']}]" if r["selector"] else "") + extra)
+    if not report:
+        print("no visual changes.")
+    return 1 if changed and not args.accept else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())